@@ -0,0 +1,237 @@
+import asyncio
+import csv
+import json
+import os
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox, scrolledtext
+from queue import Queue, Empty
+
+from utils.api_utils import acall_data_recognition_api, submit
+from utils.rate_limiter import BATCH
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+DEFAULT_CONCURRENCY = 3
+MAX_CONCURRENCY = 8
+
+
+class BatchRecognitionWindow(tk.Toplevel):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("批量图片识别")
+        self.geometry("1000x650")
+        self.configure(bg="#f0f0f0")
+
+        # 识别结果，按图片路径索引
+        self.folder = None
+        self.image_paths = []
+        self.results = {}
+        self.finished_count = 0
+
+        # 后台识别任务与界面之间的消息队列
+        self.update_queue = Queue()
+        self.batch_future = None
+
+        self.concurrency_var = tk.IntVar(value=DEFAULT_CONCURRENCY)
+        self.progress_var = tk.StringVar(value="未选择文件夹")
+
+        self.init_interface()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def init_interface(self):
+        """界面模块:初始化界面元素
+        输入参数: 无
+        返回值: 无
+        功能描述: 初始化按钮、进度条、结果列表和详情区域
+        """
+        control_frame = ttk.Frame(self)
+        control_frame.pack(fill=tk.X, padx=10, pady=10)
+
+        ttk.Button(control_frame, text="选择文件夹", command=self.choose_folder).pack(side=tk.LEFT, padx=5)
+        ttk.Label(control_frame, text="并发数").pack(side=tk.LEFT, padx=(15, 5))
+        ttk.Spinbox(
+            control_frame, from_=1, to=MAX_CONCURRENCY, width=5,
+            textvariable=self.concurrency_var, state="readonly"
+        ).pack(side=tk.LEFT)
+        self.start_button = ttk.Button(control_frame, text="开始识别", command=self.start_batch)
+        self.start_button.pack(side=tk.LEFT, padx=15)
+        ttk.Button(control_frame, text="导出结果", command=self.export_results).pack(side=tk.LEFT, padx=5)
+
+        # 进度显示
+        progress_frame = ttk.Frame(self)
+        progress_frame.pack(fill=tk.X, padx=10)
+        self.progress_bar = ttk.Progressbar(progress_frame, mode="determinate")
+        self.progress_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Label(progress_frame, textvariable=self.progress_var, width=20).pack(side=tk.LEFT, padx=10)
+
+        # 左侧图片列表，右侧识别结果详情
+        paned = ttk.PanedWindow(self, orient=tk.HORIZONTAL)
+        paned.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        self.result_tree = ttk.Treeview(paned, columns=("status",), selectmode="browse")
+        self.result_tree.heading("#0", text="图片")
+        self.result_tree.heading("status", text="状态")
+        self.result_tree.column("status", width=80, anchor=tk.CENTER)
+        self.result_tree.bind("<<TreeviewSelect>>", lambda event: self.show_selected_result())
+        paned.add(self.result_tree, weight=1)
+
+        self.detail_text = scrolledtext.ScrolledText(paned, wrap=tk.WORD, font=("Arial", 10))
+        paned.add(self.detail_text, weight=2)
+
+    def choose_folder(self):
+        """文件模块:选择文件夹
+        输入参数: 无
+        返回值: 无
+        功能描述: 选择包含实验照片的文件夹并列出其中的图片
+        """
+        if self.batch_future is not None:
+            return
+        folder = filedialog.askdirectory(parent=self)
+        if not folder:
+            return
+
+        self.folder = folder
+        self.image_paths = sorted(
+            os.path.join(folder, name) for name in os.listdir(folder)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self.results = {
+            path: {"file": os.path.basename(path), "status": "等待", "content": ""}
+            for path in self.image_paths
+        }
+        self.finished_count = 0
+
+        self.result_tree.delete(*self.result_tree.get_children())
+        for path in self.image_paths:
+            self.result_tree.insert("", tk.END, iid=path, text=os.path.basename(path), values=("等待",))
+        self.detail_text.delete("1.0", tk.END)
+        self.update_progress()
+
+    def start_batch(self):
+        """处理模块:开始批量识别
+        输入参数: 无
+        返回值: 无
+        功能描述: 在后台事件循环中按并发上限识别所有图片
+        """
+        if self.batch_future is not None or not self.image_paths:
+            return
+
+        self.finished_count = 0
+        for path in self.image_paths:
+            self.results[path].update(status="等待", content="")
+            self.result_tree.item(path, values=("等待",))
+        self.update_progress()
+
+        self.start_button.config(state=tk.DISABLED)
+        self.batch_future = submit(self._run_batch(list(self.image_paths), self.concurrency_var.get()))
+        self.after(100, self.process_updates)
+
+    async def _run_batch(self, paths, limit):
+        """在后台事件循环中执行的批量识别协程"""
+        semaphore = asyncio.Semaphore(limit)
+
+        async def recognize(path):
+            async with semaphore:
+                self.update_queue.put(("start", path, ""))
+                async for chunk in acall_data_recognition_api(path, BATCH):
+                    self.update_queue.put(("chunk", path, chunk))
+                self.update_queue.put(("done", path, ""))
+
+        try:
+            await asyncio.gather(*(recognize(path) for path in paths))
+        finally:
+            self.update_queue.put(("finished", None, ""))
+
+    def process_updates(self):
+        """界面模块:处理识别进度
+        输入参数: 无
+        返回值: 无
+        功能描述: 将后台识别产生的数据块写入对应图片的结果并刷新界面
+        """
+        if not self.winfo_exists():
+            return
+
+        finished = False
+        changed = set()
+        while True:
+            try:
+                kind, path, chunk = self.update_queue.get_nowait()
+            except Empty:
+                break
+
+            if kind == "finished":
+                finished = True
+                continue
+
+            result = self.results[path]
+            if kind == "start":
+                result["status"] = "识别中"
+            elif kind == "chunk":
+                result["content"] += chunk
+            elif kind == "done":
+                # 接口失败时以文本形式返回错误信息
+                result["status"] = "失败" if result["content"].startswith("API调用失败") else "完成"
+                self.finished_count += 1
+            changed.add(path)
+
+        for path in changed:
+            self.result_tree.item(path, values=(self.results[path]["status"],))
+        if changed:
+            self.update_progress()
+            if self.result_tree.selection() and self.result_tree.selection()[0] in changed:
+                self.show_selected_result()
+
+        if finished:
+            self.batch_future = None
+            self.start_button.config(state=tk.NORMAL)
+        else:
+            self.after(100, self.process_updates)
+
+    def update_progress(self):
+        """更新进度条和进度文字"""
+        total = len(self.image_paths)
+        self.progress_bar.config(maximum=max(total, 1), value=self.finished_count)
+        self.progress_var.set(f"{self.finished_count}/{total}")
+
+    def show_selected_result(self):
+        """在详情区域显示当前选中图片的识别结果"""
+        selection = self.result_tree.selection()
+        if not selection:
+            return
+        self.detail_text.delete("1.0", tk.END)
+        self.detail_text.insert(tk.END, self.results[selection[0]]["content"])
+
+    def export_results(self):
+        """文件模块:导出结果
+        输入参数: 无
+        返回值: 无
+        功能描述: 将所有图片的识别结果合并保存为JSON或CSV文件
+        """
+        if not self.results:
+            messagebox.showinfo("提示", "没有可导出的识别结果", parent=self)
+            return
+
+        file_path = filedialog.asksaveasfilename(
+            parent=self,
+            defaultextension=".json",
+            filetypes=[("JSON文件", "*.json"), ("CSV文件", "*.csv")]
+        )
+        if not file_path:
+            return
+
+        rows = [self.results[path] for path in self.image_paths]
+        if file_path.lower().endswith(".csv"):
+            # utf-8-sig便于Excel正确识别中文
+            with open(file_path, "w", newline="", encoding="utf-8-sig") as f:
+                writer = csv.DictWriter(f, fieldnames=["file", "status", "content"])
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            with open(file_path, "w", encoding="utf-8") as f:
+                json.dump({"folder": self.folder, "results": rows}, f, ensure_ascii=False, indent=2)
+        messagebox.showinfo("导出完成", f"识别结果已保存到: {file_path}", parent=self)
+
+    def on_close(self):
+        """关闭窗口时取消未完成的识别任务"""
+        if self.batch_future is not None:
+            self.batch_future.cancel()
+        self.destroy()
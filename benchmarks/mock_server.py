@@ -0,0 +1,133 @@
+"""可注入故障的本地模拟接口服务器
+
+用法:
+    python benchmarks/mock_server.py [--port 8765] [--fail-first 2] [--fail-status 503]
+                                     [--fail-rate 0.3] [--drop-after 5] [--chunk-delay 0.05]
+
+实现OpenAI兼容的 /chat/completions 流式接口（SSE），用于在没有真实服务时
+测试重试、退避和熔断:
+    - fail-first: 前N个请求直接返回错误状态码
+    - fail-rate: 之后的请求按概率返回错误状态码
+    - fail-status: 错误状态码（429时附带Retry-After头）
+    - drop-after: 输出N个数据块后断开连接，模拟流中途失败
+配合 ARK_BASE_URL=http://127.0.0.1:8765 或 cli.py --base-url 使用。
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = "这是模拟服务器的回复。测量数据如下：\n| 次数 | 长度/mm |\n|---|---|\n| 1 | 12.50 |\n| 2 | 12.48 |\n"
+
+
+class FaultState:
+    """记录请求计数并决定本次请求是否注入故障"""
+
+    def __init__(self, args):
+        self.args = args
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def next_fails(self):
+        with self._lock:
+            self.count += 1
+            count = self.count
+        if count <= self.args.fail_first:
+            return True
+        return random.random() < self.args.fail_rate
+
+
+def make_handler(state):
+    args = state.args
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *params):
+            print(f"[mock] {self.address_string()} {fmt % params}", file=sys.stderr)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.endswith("/chat/completions"):
+                self._send_error(404, "not found")
+                return
+            if state.next_fails():
+                self._send_error(args.fail_status, "injected failure")
+                return
+            self._stream(body.get("model", "mock"))
+
+        def _send_error(self, status, message):
+            payload = json.dumps({"error": {"message": message, "type": "mock_error"}}).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            if status == 429:
+                self.send_header("Retry-After", "1")
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _stream(self, model):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            pieces = [REPLY[i:i + 4] for i in range(0, len(REPLY), 4)]
+            for index, piece in enumerate(pieces):
+                if args.drop_after is not None and index >= args.drop_after:
+                    # 不发送结束块和分块传输的终止块直接断开，客户端会看到连接异常中断
+                    self.close_connection = True
+                    return
+                self._send_event(self._chunk(model, {"content": piece}, None))
+                time.sleep(args.chunk_delay)
+            self._send_event(self._chunk(model, {}, "stop"))
+            self._send_data(b"data: [DONE]\n\n")
+            # 分块传输的终止块
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+
+        @staticmethod
+        def _chunk(model, delta, finish_reason):
+            return {
+                "id": "mock", "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+
+        def _send_event(self, chunk):
+            self._send_data(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+
+        def _send_data(self, data):
+            """以分块传输编码写出一块数据"""
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="可注入故障的本地模拟接口服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fail-first", type=int, default=0, help="前N个请求返回错误")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="之后请求的出错概率")
+    parser.add_argument("--fail-status", type=int, default=503, help="注入的错误状态码")
+    parser.add_argument("--drop-after", type=int, help="输出N个数据块后断开连接")
+    parser.add_argument("--chunk-delay", type=float, default=0.05, help="数据块间隔秒数")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(FaultState(args)))
+    print(f"模拟服务器运行于 http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
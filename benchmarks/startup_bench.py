@@ -0,0 +1,269 @@
+"""启动与导入耗时基准测试
+
+用法:
+    python benchmarks/startup_bench.py [--runs 5] [--output 结果.json] [--no-xvfb]
+
+对主程序和各工具窗口分别测量:
+    - 冷启动：使用全新的字节码缓存目录，所有模块从源码重新编译
+    - 热启动：使用预先生成的字节码缓存，重复多次取最小值和中位数
+    - 首次绘制耗时：从子进程开始执行到窗口完成映射和绘制
+    - 峰值内存(RSS)
+    - 各模块导入耗时（python -X importtime）
+没有DISPLAY时自动启动Xvfb虚拟显示。结果以JSON保存，便于版本间对比。
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+
+ROTATION_DIR = os.path.join(REPO_ROOT, "experiment_folders", "rotation_experiment")
+
+# 工具窗口需要一个隐藏的根窗口作为父窗口
+_ROOT = "root = tk.Tk()\nroot.withdraw()\n"
+
+# 各测试目标：(导入的模块, 在子进程中创建窗口并赋值给window的代码)
+TARGETS = {
+    "main": (
+        "main",
+        "import main\n"
+        "window = main.MainApplication()\n"
+        "cleanup = window.on_close\n",
+    ),
+    "ImageEnhanceWindow": (
+        "image_enhance",
+        _ROOT +
+        "from image_enhance import ImageEnhanceWindow\n"
+        "window = ImageEnhanceWindow(root)\n",
+    ),
+    "PlottingApp": (
+        "drawing_interface",
+        _ROOT +
+        "from drawing_interface import PlottingApp\n"
+        "window = PlottingApp(root).window\n",
+    ),
+    "ExperimentSelectionWindow": (
+        "experiment_selection",
+        _ROOT +
+        "from experiment_selection import ExperimentSelectionWindow\n"
+        "window = ExperimentSelectionWindow(root)\n",
+    ),
+    "MetalModulusExperimentWindow": (
+        "experiment_folders.metal_modulus_experiment.metal_modulus_experiment",
+        _ROOT +
+        "from experiment_folders.metal_modulus_experiment.metal_modulus_experiment import MetalModulusExperimentWindow\n"
+        "window = MetalModulusExperimentWindow(root)\n",
+    ),
+    "NewtonRingsExperimentWindow": (
+        "experiment_folders.newton_rings_experiment.newton_rings_experiment",
+        _ROOT +
+        "from experiment_folders.newton_rings_experiment.newton_rings_experiment import NewtonRingsExperimentWindow\n"
+        "window = NewtonRingsExperimentWindow(root)\n",
+    ),
+    "RotationExperimentApp": (
+        "rotation_experiment",
+        _ROOT +
+        "from rotation_experiment import RotationExperimentApp\n"
+        "window = tk.Toplevel(root)\n"
+        "RotationExperimentApp(window)\n",
+    ),
+}
+
+# 子进程探针：创建窗口，等待其完成映射和绘制后输出测量结果
+PROBE_TEMPLATE = """
+import time
+_start = time.perf_counter()
+import json, resource
+import tkinter as tk
+cleanup = None
+{setup}
+_deadline = time.perf_counter() + 30
+while not window.winfo_viewable() and time.perf_counter() < _deadline:
+    window.update()
+window.update_idletasks()
+window.update()
+_paint = time.perf_counter() - _start
+print(json.dumps({{
+    "first_paint_s": _paint,
+    "viewable": bool(window.winfo_viewable()),
+    "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}}))
+if cleanup is not None:
+    cleanup()
+else:
+    root.destroy()
+"""
+
+
+def child_env(pycache_prefix, display):
+    """子进程环境：指定字节码缓存目录和显示"""
+    env = dict(os.environ)
+    env["PYTHONPYCACHEPREFIX"] = pycache_prefix
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    env["PYTHONPATH"] = os.pathsep.join([REPO_ROOT, ROTATION_DIR])
+    if display:
+        env["DISPLAY"] = display
+    return env
+
+
+def run_probe(name, pycache_prefix, display):
+    """在子进程中运行一次窗口探针，返回测量结果"""
+    _, setup = TARGETS[name]
+    code = PROBE_TEMPLATE.format(setup=setup)
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", code], cwd=REPO_ROOT, env=child_env(pycache_prefix, display),
+        capture_output=True, text=True, timeout=120,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0 or not proc.stdout.strip():
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "no output"}
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["process_wall_s"] = wall
+    return result
+
+
+def measure_imports(module, pycache_prefix, top=15):
+    """用-X importtime测量导入耗时，返回总耗时和累计耗时最高的模块"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, env=child_env(pycache_prefix, None),
+        capture_output=True, text=True, timeout=120,
+    )
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        entries.append({
+            "module": parts[2].strip(),
+            "self_us": int(parts[0]),
+            "cumulative_us": int(parts[1]),
+        })
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed"}
+    total = next((e["cumulative_us"] for e in reversed(entries) if e["module"] == module), None)
+    return {
+        "total_us": total,
+        "top": sorted(entries, key=lambda e: e["cumulative_us"], reverse=True)[:top],
+    }
+
+
+def summarize_runs(runs):
+    """汇总多次热启动结果"""
+    ok = [r for r in runs if "error" not in r]
+    if not ok:
+        return {"error": runs[0].get("error") if runs else "no runs"}
+    paints = [r["first_paint_s"] for r in ok]
+    return {
+        "runs": len(ok),
+        "first_paint_min_s": min(paints),
+        "first_paint_median_s": statistics.median(paints),
+        "peak_rss_kb_max": max(r["peak_rss_kb"] for r in ok),
+    }
+
+
+def start_xvfb():
+    """启动Xvfb虚拟显示，返回(进程, DISPLAY)"""
+    if shutil.which("Xvfb") is None:
+        raise RuntimeError("未找到Xvfb，请安装xvfb或在有显示的环境中使用--no-xvfb运行")
+    for number in range(99, 120):
+        if os.path.exists(f"/tmp/.X11-unix/X{number}"):
+            continue
+        proc = subprocess.Popen(
+            ["Xvfb", f":{number}", "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        time.sleep(1.0)
+        if proc.poll() is None:
+            return proc, f":{number}"
+    raise RuntimeError("无法启动Xvfb")
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动与导入耗时基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="热启动重复次数")
+    parser.add_argument("--targets", nargs="*", default=list(TARGETS), choices=list(TARGETS), help="测试目标")
+    parser.add_argument("--output", help="结果JSON路径，默认保存到benchmarks/results")
+    parser.add_argument("--no-xvfb", action="store_true", help="不启动Xvfb，使用当前DISPLAY")
+    args = parser.parse_args()
+
+    xvfb = None
+    display = os.environ.get("DISPLAY")
+    if not args.no_xvfb and not display:
+        xvfb, display = start_xvfb()
+
+    results = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": sys.version,
+        "platform": platform.platform(),
+        "runs": args.runs,
+        "targets": {},
+    }
+    warm_cache = tempfile.mkdtemp(prefix="bench-pycache-warm-")
+    try:
+        for name in args.targets:
+            module, _ = TARGETS[name]
+            print(f"测试 {name} ...", file=sys.stderr)
+
+            # 冷启动：全新的字节码缓存目录
+            cold_cache = tempfile.mkdtemp(prefix="bench-pycache-cold-")
+            try:
+                cold = run_probe(name, cold_cache, display)
+            finally:
+                shutil.rmtree(cold_cache, ignore_errors=True)
+
+            # 热启动：先运行一次生成字节码缓存，再重复测量
+            run_probe(name, warm_cache, display)
+            warm = summarize_runs([run_probe(name, warm_cache, display) for _ in range(args.runs)])
+
+            results["targets"][name] = {
+                "cold": cold,
+                "warm": warm,
+                "imports": measure_imports(module, warm_cache),
+            }
+    finally:
+        shutil.rmtree(warm_cache, ignore_errors=True)
+        if xvfb is not None:
+            xvfb.terminate()
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"startup-{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    for name, data in results["targets"].items():
+        warm = data["warm"]
+        if "error" in warm:
+            print(f"{name:32s} 失败: {warm['error']}")
+        else:
+            print(f"{name:32s} 热启动首次绘制 {warm['first_paint_median_s'] * 1000:8.1f} ms  "
+                  f"峰值RSS {warm['peak_rss_kb_max'] / 1024:7.1f} MB")
+    print(f"结果已保存到: {output}")
+
+
+if __name__ == "__main__":
+    main()
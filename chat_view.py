@@ -0,0 +1,230 @@
+import tkinter as tk
+import markdown  # 确保已安装markdown库: pip install markdown
+
+# 各角色消息块的样式：(背景色, 标题)
+MESSAGE_STYLES = {
+    "user": ("#e6f7ff", "用户"),
+    "ai": ("#f0f0f0", "AI"),
+    "system": ("#ffe6e6", "系统"),
+}
+
+
+def render_message_html(message):
+    """函数模块名称: 渲染单条消息
+    输入参数: message - 消息字典，包含role和content
+    返回值: 消息对应的HTML字符串
+    功能描述: AI消息按Markdown转换，其余消息按纯文本显示
+    """
+    style = MESSAGE_STYLES.get(message["role"])
+    if style is None:
+        return ""
+    background, title = style
+
+    html = f'<div style="background-color: {background}; padding: 8px; margin: 5px; border-radius: 5px;">'
+    html += f'<p style="font-weight: bold; margin: 0;">{title}</p>'
+    if message["role"] == "ai":
+        # 将Markdown转换为HTML
+        html += f'<div style="margin: 0;">{markdown.markdown(message["content"])}</div>'
+    else:
+        html += f'<p style="margin: 0;">{message["content"]}</p>'
+    html += '</div>'
+    return html
+
+
+def append_html(widget, html):
+    """函数模块名称: 追加HTML
+    输入参数:
+        widget - tkhtmlview的HTMLLabel控件
+        html - 要追加的HTML字符串
+    返回值: 无
+    功能描述: 在控件末尾解析并插入HTML，不清空已有内容
+    """
+    prev_state = widget.cget("state")
+    widget.config(state=tk.NORMAL)
+    widget.mark_set(tk.INSERT, tk.END)
+    widget.html_parser.w_set_html(widget, html, strip=True)
+    widget.config(state=prev_state)
+
+
+def delete_range(widget, start, end=tk.END):
+    """函数模块名称: 删除内容
+    输入参数:
+        widget - HTMLLabel控件
+        start - 起始位置（索引或标记名）
+        end - 结束位置，默认为末尾
+    返回值: 无
+    功能描述: 删除start到end之间的内容
+    """
+    prev_state = widget.cget("state")
+    widget.config(state=tk.NORMAL)
+    widget.delete(start, end)
+    widget.config(state=prev_state)
+
+
+class ChatRenderer:
+    """对话面板增量、窗口化渲染器
+
+    已完成的消息只转换一次HTML并缓存；控件中只实例化一个连续窗口
+    [first, last)内的消息，每条消息起点用标记记录。窗口包含最新消息时
+    （跟随模式），新完成的消息直接追加到末尾；从第一条仍在流式输出的
+    消息（带有"streaming"标记）开始的尾部消息作为一个块，每次刷新重新
+    渲染（请求被替换时，旧回复结束前新问题和新回复也在尾部显示）。
+    用户在顶部/底部继续滚动时，按页加载更早/更新的消息并从另一端裁剪，
+    使控件中的消息数保持在WINDOW_SIZE左右。已到达内存中最早的消息时，
+    调用history_loader，由其把更早的一页插入消息列表开头并返回这些消息；
+    渲染器只读取消息列表，不修改它。
+    """
+
+    STREAM_MARK = "chat_stream_start"
+    WINDOW_SIZE = 30   # 控件中最多实例化的消息数
+    PAGE_SIZE = 10     # 滚动到边缘时每次加载的消息数
+
+    def __init__(self, widget, history_loader=None):
+        self.widget = widget
+        self.history_loader = history_loader  # 插入并返回更早一页消息（从旧到新）的函数
+        self.html_cache = []        # 已完成消息的HTML，与消息下标一一对应
+        self.messages = []
+        self.first = 0              # 窗口内第一条消息的下标
+        self.last = 0               # 窗口内最后一条消息的下一个下标
+        self.has_stream_block = False
+
+        # 滚动到窗口边缘时按需加载
+        widget.bind("<MouseWheel>", lambda event: self.on_scroll(event.delta > 0), add="+")
+        widget.bind("<Button-4>", lambda event: self.on_scroll(True), add="+")
+        widget.bind("<Button-5>", lambda event: self.on_scroll(False), add="+")
+
+    @property
+    def following(self):
+        """窗口是否包含最新的已完成消息"""
+        return self.last == len(self.html_cache)
+
+    def reset(self):
+        """清空控件和缓存"""
+        self.html_cache = []
+        self.first = self.last = 0
+        self.has_stream_block = False
+        self._clear_widget()
+
+    def _mark(self, index):
+        return f"chat_msg_{index}"
+
+    def _clear_widget(self):
+        self.widget.set_html("")
+        for name in self.widget.mark_names():
+            if name.startswith("chat_msg_"):
+                self.widget.mark_unset(name)
+
+    def _append_message(self, index):
+        """在控件末尾实例化第index条已完成消息"""
+        self.widget.mark_set(self._mark(index), "end-1c")
+        self.widget.mark_gravity(self._mark(index), tk.LEFT)
+        append_html(self.widget, self.html_cache[index])
+
+    def _at_bottom(self):
+        return self.widget.yview()[1] >= 0.999
+
+    def _at_top(self):
+        return self.widget.yview()[0] <= 0.0
+
+    def refresh(self, messages):
+        """函数模块名称: 刷新显示
+        输入参数: messages - 消息列表
+        返回值: 无
+        功能描述: 缓存新完成的消息；跟随模式下追加到控件末尾并重新渲染
+                 从第一条流式输出的消息开始的尾部，必要时裁剪窗口顶部
+        """
+        self.messages = messages
+        if len(messages) < len(self.html_cache):
+            # 历史被清空或替换，整体重建
+            self.reset()
+
+        following = self.following
+        at_bottom = self._at_bottom()
+
+        # 先移除上一次渲染的流式消息块
+        if self.has_stream_block:
+            delete_range(self.widget, self.STREAM_MARK)
+            self.has_stream_block = False
+
+        index = len(self.html_cache)
+        while index < len(messages) and not messages[index].get("streaming"):
+            self.html_cache.append(render_message_html(messages[index]))
+            index += 1
+
+        if not following:
+            # 用户正在查看较早的消息，新消息只缓存，滚动到底部时再加载
+            return
+
+        for i in range(self.last, len(self.html_cache)):
+            self._append_message(i)
+        self.last = len(self.html_cache)
+
+        if at_bottom:
+            # 查看最新消息时裁剪窗口顶部（在追加流式消息块之前进行，重建窗口会清空控件）
+            self._trim_top()
+
+        if index < len(messages):
+            # 记录流式消息块的起点，下次刷新时从这里截断
+            self.widget.mark_set(self.STREAM_MARK, "end-1c")
+            self.widget.mark_gravity(self.STREAM_MARK, tk.LEFT)
+            append_html(self.widget, "".join(render_message_html(message) for message in messages[index:]))
+            self.has_stream_block = True
+
+        if at_bottom:
+            # 保持视图跟随末尾
+            self.widget.see(tk.END)
+
+        self.widget.update_idletasks()
+
+    def _trim_top(self):
+        """窗口超出一页以上时，只保留最新的WINDOW_SIZE条消息
+
+        tkhtmlview的样式标签以创建时的文本位置命名，直接删除顶部内容后
+        旧标签会随文本上移，之后追加的内容可能复用同名标签并改掉旧消息
+        的样式。因此不做局部删除，而是整体重建窗口（清空控件会丢弃全部
+        标签）；每次裁掉一整页，重建的次数很少。
+        """
+        if self.last - self.first <= self.WINDOW_SIZE + self.PAGE_SIZE:
+            return
+        self._materialize(self.last - self.WINDOW_SIZE, self.last, self.last - 1)
+
+    def _materialize(self, first, last, anchor):
+        """重建窗口[first, last)，并把视图定位到第anchor条消息"""
+        self._clear_widget()
+        self.has_stream_block = False
+        self.first, self.last = first, last
+        for i in range(first, last):
+            self._append_message(i)
+        self.widget.yview(self._mark(anchor))
+
+    def _prepend_history(self):
+        """通过history_loader加载更早的一页消息，并在缓存开头补上其HTML"""
+        if self.history_loader is None:
+            return
+        older = self.history_loader()
+        if not older:
+            return
+        self.html_cache[0:0] = [render_message_html(message) for message in older]
+        # 下标整体后移；标记名随之失效，稍后由_materialize重建
+        self.first += len(older)
+        self.last += len(older)
+
+    def on_scroll(self, up):
+        """函数模块名称: 滚动加载
+        输入参数: up - 是否向上滚动
+        返回值: 无
+        功能描述: 在窗口顶部继续上滚时加载更早的一页，在底部继续下滚时
+                 加载更新的一页；回到最新消息后恢复跟随模式
+        """
+        if up and self._at_top() and self.first == 0:
+            self._prepend_history()
+
+        if up and self._at_top() and self.first > 0:
+            first = max(0, self.first - self.PAGE_SIZE)
+            self._materialize(first, min(self.last, first + self.WINDOW_SIZE), self.first)
+        elif not up and self._at_bottom() and not self.following:
+            last = min(len(self.html_cache), self.last + self.PAGE_SIZE)
+            self._materialize(max(self.first, last - self.WINDOW_SIZE), last, self.last - 1)
+            if self.following:
+                # 已回到最新消息，补上正在流式输出的消息
+                self.refresh(self.messages)
@@ -0,0 +1,97 @@
+"""无界面命令行入口
+
+用法:
+    python -m cli recognize 图片1.jpg 图片2.png [--concurrency 3]
+    python -m cli ask "计算 1.2 1.3 1.25 的标准差"
+
+复用utils/api_utils.py的流式接口，每个数据块输出一行JSON(NDJSON)到标准输出，
+可配合--base-url指向本地模拟服务器进行测试和基准测量；
+--mode record录制真实回复，--mode replay离线回放（--replay-speed 0为尽快输出）。
+"""
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+
+from utils import api_utils
+
+_output_lock = threading.Lock()
+
+
+def emit(record):
+    """输出一行JSON并立即刷新"""
+    with _output_lock:
+        sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+
+
+async def stream_to_stdout(source, agen):
+    """将一个流式回复逐块输出，结束时输出汇总记录"""
+    start = time.perf_counter()
+    first_chunk = None
+    text = ""
+    async for chunk in agen:
+        if first_chunk is None:
+            first_chunk = time.perf_counter() - start
+        text += chunk
+        emit({"event": "chunk", "source": source, "text": chunk})
+    # 接口失败时以文本形式返回错误信息
+    failed = text.startswith("API调用失败")
+    emit({
+        "event": "error" if failed else "done",
+        "source": source,
+        "text": text,
+        "ttft_s": first_chunk,
+        "elapsed_s": time.perf_counter() - start,
+    })
+    return not failed
+
+
+async def recognize(paths, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(path):
+        async with semaphore:
+            return await stream_to_stdout(path, api_utils.acall_data_recognition_api(path))
+
+    return all(await asyncio.gather(*(run(path) for path in paths)))
+
+
+async def ask(prompt):
+    return await stream_to_stdout("ask", api_utils.acall_ai_assistant_api(prompt))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m cli", description="图片识别与智能助手命令行工具")
+    parser.add_argument("--base-url", help="接口地址，例如本地模拟服务器")
+    parser.add_argument("--api-key", help="接口密钥")
+    parser.add_argument("--mode", choices=api_utils.stream_replay.MODES,
+                        help="运行模式：live正常请求，record请求并录制，replay离线回放录制")
+    parser.add_argument("--replay-speed", type=float, help="回放倍速，0表示尽快输出")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    recognize_parser = subparsers.add_parser("recognize", help="识别图片中的实验数据")
+    recognize_parser.add_argument("images", nargs="+", help="图片路径")
+    recognize_parser.add_argument("--concurrency", type=int, default=3, help="同时识别的图片数")
+
+    ask_parser = subparsers.add_parser("ask", help="向智能助手提问")
+    ask_parser.add_argument("prompt", help="问题内容")
+
+    args = parser.parse_args(argv)
+    api_utils.configure(base_url=args.base_url, api_key=args.api_key,
+                        mode=args.mode, replay_speed=args.replay_speed)
+
+    if args.command == "recognize":
+        coro = recognize(args.images, max(1, args.concurrency))
+    else:
+        coro = ask(args.prompt)
+
+    # 在共享的后台事件循环中执行，与图形界面使用相同的连接池和缓存
+    ok = api_utils.submit(coro).result()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
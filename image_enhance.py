@@ -1,11 +1,65 @@
+import threading
 import tkinter as tk
 from tkinter import ttk, filedialog
 from PIL import Image, ImageTk, ImageDraw
 import numpy as np
 import cv2
 from utils.image_utils import process_image
+from utils.latest_worker import LatestJobWorker
+from utils.ui_channel import CoalescingChannel
+
+# 预览参数：界面上可调的全部图像处理参数
+PREVIEW_PARAMS = (
+    "contrast_factor", "brightness_offset", "brightness_low", "brightness_high",
+    "edge_detection", "erode_iterations", "dilate_iterations", "morph_kernel_size",
+    "invert_colors", "enable_median_blur", "median_blur_size",
+    "enable_connected_components", "min_component_area",
+)
+# 处理阶段：(名称, 本阶段使用的参数, 处理方法名)，按顺序依次执行。
+# 对比度和明度拉伸都是逐灰度级的映射，合并为一个查找表阶段。
+# 每个阶段的结果按"源图 + 本阶段及所有上游阶段的参数"缓存，
+# 参数变化时只重新计算它所在的阶段及其下游阶段
+PIPELINE_STAGES = (
+    ("gray", (), "stage_gray"),
+    ("tone", ("contrast_factor", "brightness_offset", "brightness_low", "brightness_high"), "stage_tone"),
+    ("edges", ("edge_detection", "edge_blur_size"), "stage_edges"),
+    ("threshold", (), "stage_threshold"),
+    ("morphology", ("morph_kernel_size", "erode_iterations", "dilate_iterations"), "stage_morphology"),
+    ("invert", ("invert_colors",), "stage_invert"),
+    ("median", ("enable_median_blur", "median_blur_size"), "stage_median"),
+    ("components", ("enable_connected_components", "min_component_area"), "stage_components"),
+)
+DEFAULT_PROXY_SIZE = (800, 800)  # 预览区域尚未布局时的代理图尺寸
+
+
+def _scale_kernel(size, scale):
+    """按比例缩放核大小，保持为奇数"""
+    return max(1, int(round(size * scale))) | 1
+
+
+def scale_params(params, scale):
+    """函数模块名称: 缩放处理参数
+    输入参数:
+        params - 原图分辨率下的处理参数
+        scale - 代理图与原图的边长比例
+    返回值: 适用于代理图的参数副本
+    功能描述: 核大小按边长比例缩放，连通域面积按面积比例缩放，
+             使代理图上的预览与全分辨率结果的效果一致
+    """
+    if scale >= 1:
+        return params
+    scaled = dict(params)
+    scaled["morph_kernel_size"] = _scale_kernel(params["morph_kernel_size"], scale)
+    scaled["median_blur_size"] = _scale_kernel(params["median_blur_size"], scale)
+    scaled["edge_blur_size"] = _scale_kernel(params["edge_blur_size"], scale)
+    scaled["min_component_area"] = max(1, int(round(params["min_component_area"] * scale * scale)))
+    return scaled
 
 class ImageEnhanceWindow(tk.Toplevel):
+    PREVIEW_DEBOUNCE_MS = 60  # 滑块停止变化多久后才开始处理
+    PREVIEW_MAX_FPS = 30
+    EDGE_BLUR_SIZE = 5  # 边缘检测前高斯模糊的核大小
+
     def __init__(self, parent):
         super().__init__(parent)
         self.title("牛顿环图像增强")
@@ -39,6 +93,16 @@ class ImageEnhanceWindow(tk.Toplevel):
         self.enable_connected_components = False
         self.min_component_area = 10
 
+        # 预览在后台线程处理，只保留最新的参数，结果通过事件通道送回主线程
+        self.preview_worker = LatestJobWorker("image-enhance-preview")
+        self.preview_channel = CoalescingChannel(self, self.on_preview_ready, max_fps=self.PREVIEW_MAX_FPS)
+        self.preview_lock = threading.Lock()
+        self.preview_result = None
+        self.preview_after_id = None
+        self.preview_size = None   # 当前代理图对应的预览区域尺寸
+        self.proxy_cache = None    # (原图, 尺寸, 代理图)，只在后台线程中访问
+        self.stage_cache = {}      # 阶段名 -> (键, 输出)，只在后台线程中访问
+
         # 主布局
         self.main_paned = ttk.PanedWindow(self, orient=tk.HORIZONTAL)
         self.main_paned.pack(fill=tk.BOTH, expand=True)
@@ -63,6 +127,7 @@ class ImageEnhanceWindow(tk.Toplevel):
         self.init_image_enhance_interface()
         self.bind("<Configure>", self.on_window_resize)
         self.main_paned.bind("<B1-Motion>", self.on_paned_drag)
+        self.bind("<Destroy>", self.on_destroy)
 
     def init_image_enhance_interface(self):
         """界面模块:初始化界面元素
@@ -99,10 +164,13 @@ class ImageEnhanceWindow(tk.Toplevel):
         # 功能按钮
         ttk.Button(btn_frame, text="导入图片", command=self.import_image).pack(side=tk.LEFT, expand=True)
         ttk.Button(btn_frame, text="下载图片", command=self.download_image).pack(side=tk.LEFT, expand=True)
+        ttk.Button(
+            btn_frame, text="全分辨率预览", command=lambda: self.update_preview(full_resolution=True)
+        ).pack(side=tk.LEFT, expand=True)
         self.edge_detection_var = tk.BooleanVar(value=False)
         ttk.Checkbutton(
             btn_frame, text="边缘检测", variable=self.edge_detection_var,
-            command=self.update_preview
+            command=self.schedule_preview
         ).pack(side=tk.LEFT, expand=True)
 
         # MODIFIED: 添加颜色反转按钮
@@ -220,48 +288,6 @@ class ImageEnhanceWindow(tk.Toplevel):
             command=lambda v: self.update_param('morph_kernel_size', int(float(v)) | 1))  # 确保为奇数
         self.kernel_slider.pack(fill=tk.X)
 
-    def update_preview(self, value=None):
-        if not self.original_image:
-            return
-
-        # 转换为灰度图
-        gray = np.array(self.original_image.convert('L'))
-        
-        # 对比度增强
-        enhanced = self.enhance_contrast(gray)
-        # 明度拉伸
-        enhanced = self.brightness_stretch(enhanced)
-        
-        # 二值化处理 (新增)
-        _, binary = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
-        
-        # 形态学操作 (新增)
-        kernel = np.ones((self.morph_kernel_size, self.morph_kernel_size), np.uint8)
-        if self.erode_iterations > 0:
-            binary = cv2.erode(binary, kernel, iterations=self.erode_iterations)
-        if self.dilate_iterations > 0:
-            binary = cv2.dilate(binary, kernel, iterations=self.dilate_iterations)
-        
-        # 边缘检测
-        if self.edge_detection_var.get():
-            edges = self.detect_edges(binary)  # 修改为对二值化图像进行边缘检测
-            # 合并边缘检测结果
-            result = np.where(edges > 0, 255, binary)
-        else:
-            result = binary
-        
-        # 创建预览图
-        preview_array = np.zeros((*result.shape, 3), dtype=np.uint8)
-        preview_array[result == 0] = [0, 0, 0]      # 黑色表示边缘/暗区
-        preview_array[result == 255] = [255, 255, 255]  # 白色表示背景/亮区
-        
-        if self.invert_colors:
-            preview_array = 255 - preview_array
-            
-        self.processed_image = Image.fromarray(preview_array)
-        self.display_preview_image(self.processed_image)
-
-
     def init_styles(self):
         """界面模块:初始化样式
         输入参数: 无
@@ -311,174 +337,233 @@ class ImageEnhanceWindow(tk.Toplevel):
         功能描述: 更新处理参数并刷新预览
         """
         setattr(self, param_name, value)
-        self.update_preview()
+        self.schedule_preview()
 
-    def enhance_contrast(self, image_array):
+    def schedule_preview(self):
+        """参数模块:延迟刷新预览
+        输入参数: 无
+        返回值: 无
+        功能描述: 拖动滑块时合并连续的参数变化，停止变化后再提交处理
+        """
+        if self.preview_after_id is not None:
+            self.after_cancel(self.preview_after_id)
+        self.preview_after_id = self.after(self.PREVIEW_DEBOUNCE_MS, self.update_preview)
+
+    def snapshot_params(self):
+        """在主线程读取当前的全部处理参数（后台线程不能访问Tk变量）"""
+        params = {name: getattr(self, name) for name in PREVIEW_PARAMS if name != "edge_detection"}
+        params["edge_detection"] = self.edge_detection_var.get()
+        params["edge_blur_size"] = self.EDGE_BLUR_SIZE
+        return params
+
+    def enhance_contrast(self, levels, params):
         """图像处理模块:增强对比度
-        输入参数: image_array - 图像数组
-        返回值: 增强后的图像数组
+        输入参数:
+            levels - 灰度级数组（float）
+            params - 处理参数
+        返回值: 调整后的灰度级数组（uint8）
         功能描述: 应用对比度和亮度调整
         """
-        img = image_array.astype(float)
-        img = (img - 128) * self.contrast_factor + 128 + self.brightness_offset
-        return np.clip(img, 0, 255).astype(np.uint8)
+        levels = (levels - 128) * params["contrast_factor"] + 128 + params["brightness_offset"]
+        return np.clip(levels, 0, 255).astype(np.uint8)
 
-    def brightness_stretch(self, image_array):
+    def brightness_stretch(self, levels, params):
         """图像处理模块:明度拉伸
-        输入参数: image_array - 图像数组
-        返回值: 处理后的图像数组
-        功能描述: 根据设定的上下限拉伸明度
+        输入参数:
+            levels - 灰度级数组（uint8）
+            params - 处理参数
+        返回值: 处理后的灰度级数组
+        功能描述: 低于下限设为0，高于上限设为255，中间值线性拉伸到[0,100]
         """
-        if self.brightness_high <= self.brightness_low:
-            return image_array
-            
-        img = image_array.astype(float)
-        # 低于下限设为0
-        img[img < self.brightness_low] = 0
-        # 高于上限设为255
-        img[img > self.brightness_high] = 255
-        # 中间值线性拉伸到[0,100]
-        mask = (img >= self.brightness_low) & (img <= self.brightness_high)
-        img[mask] = ((img[mask] - self.brightness_low) / 
-                    (self.brightness_high - self.brightness_low)) * 100
-        return img.astype(np.uint8)
-
-    def detect_edges(self, image_array):
+        low, high = params["brightness_low"], params["brightness_high"]
+        if high <= low:
+            return levels
+        stretched = ((levels.astype(float) - low) / (high - low)) * 100
+        return np.where(levels < low, 0, np.where(levels > high, 255, stretched)).astype(np.uint8)
+
+    def tone_lut(self, params):
+        """图像处理模块:色调查找表
+        输入参数: params - 处理参数
+        返回值: 256项uint8查找表
+        功能描述: 把对比度调整和明度拉伸依次作用在0~255全部灰度级上，
+                 得到合并后的映射
+        """
+        levels = np.arange(256, dtype=float)
+        return self.brightness_stretch(self.enhance_contrast(levels, params), params)
+
+    def stage_tone(self, image_array, params):
+        """图像处理模块:对比度和明度拉伸（一次查表完成，不产生浮点中间图像）"""
+        return cv2.LUT(image_array, self.tone_lut(params))
+
+    def detect_edges(self, image_array, blur_size=EDGE_BLUR_SIZE):
         """图像处理模块:边缘检测
-        输入参数: image_array - 图像数组
+        输入参数:
+            image_array - 图像数组
+            blur_size - 高斯模糊核大小
         返回值: 边缘检测后的图像数组
         功能描述: 使用Canny算法进行边缘检测
         """
         # 高斯模糊降噪
-        blurred = cv2.GaussianBlur(image_array, (5, 5), 0)
+        blurred = cv2.GaussianBlur(image_array, (blur_size, blur_size), 0)
         # Canny边缘检测
         edges = cv2.Canny(blurred, 50, 150)
         return edges
 
-    def update_preview(self, value=None):
+    def update_preview(self, value=None, full_resolution=False):
         """图像处理模块:更新预览
-        输入参数: value - 可选参数
+        输入参数:
+            value - 可选参数
+            full_resolution - 是否按原图分辨率处理
         返回值: 无
-        功能描述: 生成并显示处理后的预览图像
+        功能描述: 读取当前参数，交给后台线程生成预览；旧的未完成任务被丢弃。
+                 默认只处理缩小到预览区域大小的代理图
         """
+        self.preview_after_id = None
         if not self.original_image:
             return
-
-        # 转换为灰度图
-        gray = np.array(self.original_image.convert('L'))
-        
-        # 对比度增强
-        enhanced = self.enhance_contrast(gray)
-        # 明度拉伸
-        enhanced = self.brightness_stretch(enhanced)
-        
-        # 边缘检测
-        if self.edge_detection_var.get():
-            edges = self.detect_edges(enhanced)
-            # 合并边缘检测结果
-            result = np.where(edges > 0, 255, enhanced)
-        else:
-            result = enhanced
-            
-        # 二值化处理
-        _, binary = cv2.threshold(result, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
-        
-        # 形态学操作 (腐蚀膨胀)
-        kernel = np.ones((self.morph_kernel_size, self.morph_kernel_size), np.uint8)
-        if self.erode_iterations > 0:
-            binary = cv2.erode(binary, kernel, iterations=self.erode_iterations)
-        if self.dilate_iterations > 0:
-            binary = cv2.dilate(binary, kernel, iterations=self.dilate_iterations)
-        
-        # 创建预览图
-        preview_array = np.zeros((*binary.shape, 3), dtype=np.uint8)
-        preview_array[binary == 0] = [0, 0, 0]      # 黑色表示边缘/暗区
-        preview_array[binary == 255] = [255, 255, 255]  # 白色表示背景/亮区
-        
-        # 颜色反转处理
-        if self.invert_colors:
-            preview_array = 255 - preview_array
-            
-        # 中值滤波去噪
-        if self.enable_median_blur:
-            preview_array = cv2.medianBlur(preview_array, self.median_blur_size)
-            
-        # 连通域分析去噪
-        if self.enable_connected_components:
-            gray = cv2.cvtColor(preview_array, cv2.COLOR_BGR2GRAY)
-            _, binary = cv2.threshold(gray, 1, 255, cv2.THRESH_BINARY)
-            num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(binary, 8, cv2.CV_32S)
-            
-            clean_img = np.zeros_like(binary)
-            for i in range(1, num_labels):
-                if stats[i, cv2.CC_STAT_AREA] >= self.min_component_area:
-                    clean_img[labels == i] = 255
-                    
-            preview_array = cv2.cvtColor(clean_img, cv2.COLOR_GRAY2BGR)
-            
-        self.processed_image = Image.fromarray(preview_array)
+        size = None if full_resolution else self.preview_area_size()
+        self.preview_size = size
+        self.preview_worker.submit(self._render_preview_job, self.original_image, self.snapshot_params(), size)
+
+    def preview_area_size(self):
+        """预览区域当前尺寸，尚未布局时使用默认值"""
+        width = self.preview_image_frame.winfo_width()
+        height = self.preview_image_frame.winfo_height()
+        if width <= 1 or height <= 1:
+            return DEFAULT_PROXY_SIZE
+        return width, height
+
+    def get_proxy_image(self, image, size):
+        """后台线程：获取缩小到size以内的代理图（同一原图和尺寸只缩放一次）"""
+        if self.proxy_cache is not None and self.proxy_cache[0] is image and self.proxy_cache[1] == size:
+            return self.proxy_cache[2]
+        proxy = image.convert('L')
+        proxy.thumbnail(size, Image.Resampling.LANCZOS)
+        self.proxy_cache = (image, size, proxy)
+        return proxy
+
+    def _render_preview_job(self, is_stale, image, params, size):
+        """后台线程：生成预览图，未过时才送回主线程"""
+        if size is not None:
+            proxy = self.get_proxy_image(image, size)
+            params = scale_params(params, proxy.width / image.width)
+            image = proxy
+        result = self.render_preview(image, params, is_stale, self.stage_cache)
+        if result is None or is_stale():
+            return
+        with self.preview_lock:
+            self.preview_result = result
+        try:
+            self.preview_channel.notify("preview")
+        except (tk.TclError, RuntimeError):
+            # 窗口已关闭
+            pass
+
+    def on_preview_ready(self, key, force):
+        """主线程：显示后台生成的预览图"""
+        with self.preview_lock:
+            result, self.preview_result = self.preview_result, None
+        if result is None:
+            return
+        self.processed_image = result
         self.display_preview_image(self.processed_image)
 
-    def display_preview_image(self, image):
-        """显示模块:显示预览图
-        输入参数: image - PIL图像对象
-        返回值: 无
-        功能描述: 在右侧面板显示处理后的图像
+    def render_preview(self, image, params, is_stale=lambda: False, cache=None):
+        """图像处理模块:生成预览图
+        输入参数:
+            image - 原始PIL图像
+            params - snapshot_params()得到的处理参数
+            is_stale - 返回任务是否已过时的函数，各阶段之间检查
+            cache - 阶段结果缓存字典，为None时不使用缓存
+        返回值: 处理后的PIL图像；任务过时时返回None
+        功能描述: 按PIPELINE_STAGES依次进行灰度、对比度与明度拉伸、边缘检测、
+                 二值化、形态学、反转和去噪处理，参数未变的上游阶段直接使用
+                 缓存结果；全程使用单通道数组，不访问任何Tk控件
         """
-        if self.processed_image:
-            frame_width = self.preview_image_frame.winfo_width()
-            frame_height = self.preview_image_frame.winfo_height()
-            resized_image = self.resize_image(image, (frame_width, frame_height))
-            self.preview_tk_image = ImageTk.PhotoImage(resized_image)
-            self.preview_label.config(image=self.preview_tk_image)
-
-    def resize_image(self, image, size):
-        """工具模块:调整图像大小
-        输入参数: 
-            image - PIL图像对象
-            size - 目标尺寸
-        返回值: 调整后的图像
-        功能描述: 保持宽高比调整图像大小
+        if cache is not None and cache.get("source") is not image:
+            # 换了源图（新导入的图片或不同尺寸的代理图），缓存全部失效
+            cache.clear()
+            cache["source"] = image
+
+        data = image
+        key = ()
+        for name, param_names, method in PIPELINE_STAGES:
+            key += tuple(params[param] for param in param_names)
+            entry = cache.get(name) if cache is not None else None
+            if entry is not None and entry[0] == key:
+                data = entry[1]
+                continue
+            if is_stale():
+                return None
+            # 各阶段都返回新数组，不修改输入，缓存的结果不会被下游改动
+            data = getattr(self, method)(data, params)
+            if cache is not None:
+                cache[name] = (key, data)
+        return Image.fromarray(data)
+
+    def stage_gray(self, image, params):
+        """图像处理模块:转换为灰度图"""
+        return np.array(image.convert('L'))
+
+    def stage_edges(self, image_array, params):
+        """图像处理模块:边缘检测并合并到图像中"""
+        if not params["edge_detection"]:
+            return image_array
+        edges = self.detect_edges(image_array, params["edge_blur_size"])
+        return np.where(edges > 0, 255, image_array).astype(np.uint8)
+
+    def stage_threshold(self, image_array, params):
+        """图像处理模块:Otsu二值化"""
+        _, binary = cv2.threshold(image_array, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        return binary
+
+    def stage_morphology(self, binary, params):
+        """图像处理模块:形态学操作（腐蚀膨胀）"""
+        kernel = np.ones((params["morph_kernel_size"], params["morph_kernel_size"]), np.uint8)
+        if params["erode_iterations"] > 0:
+            binary = cv2.erode(binary, kernel, iterations=params["erode_iterations"])
+        if params["dilate_iterations"] > 0:
+            binary = cv2.dilate(binary, kernel, iterations=params["dilate_iterations"])
+        return binary
+
+    def stage_invert(self, binary, params):
+        """图像处理模块:按需反转颜色（黑色表示边缘/暗区，白色表示背景/亮区）"""
+        if params["invert_colors"]:
+            return 255 - binary
+        return binary
+
+    def stage_median(self, mask, params):
+        """图像处理模块:中值滤波去噪"""
+        if params["enable_median_blur"] and params["median_blur_size"] > 1:
+            return cv2.medianBlur(mask, params["median_blur_size"])
+        return mask
+
+    def stage_components(self, mask, params):
+        """图像处理模块:连通域分析去噪
+        输入参数:
+            mask - 单通道0/255二值图
+            params - 处理参数
+        返回值: 去噪后的二值图
+        功能描述: 移除面积小于min_component_area的白色连通域；按标签建立
+                 保留/移除查找表，一次索引得到结果，耗时与连通域数量无关
         """
-        if image.width > 0 and image.height > 0:
-            ratio = min(size[0] / image.width, size[1] / image.height)
-            new_size = (int(image.width * ratio), int(image.height * ratio))
-            return image.resize(new_size, Image.Resampling.LANCZOS)
-        return image
+        if not params["enable_connected_components"]:
+            return mask
+        num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(mask, 8, cv2.CV_32S)
 
-    def on_window_resize(self, event):
-        """事件模块:窗口大小变化
-        输入参数: event - 事件对象
-        返回值: 无
-        功能描述: 响应窗口大小变化事件
-        """
-        if self.original_image:
-            self.display_original_image()
-        if self.processed_image:
-            self.display_preview_image(self.processed_image)
+        # 标签查找表：面积足够的连通域为255，背景（标签0）和小连通域为0
+        keep = np.where(stats[:, cv2.CC_STAT_AREA] >= params["min_component_area"], 255, 0).astype(np.uint8)
+        keep[0] = 0
+        return keep[labels]
 
-    def on_paned_drag(self, event):
-        """事件模块:分割线拖动
+    def on_destroy(self, event):
+        """事件模块:窗口关闭
         输入参数: event - 事件对象
         返回值: 无
-        功能描述: 响应分割线拖动事件
+        功能描述: 停止预览后台线程
         """
-        if self.original_image:
-            self.display_original_image()
-        if self.processed_image:
-            self.display_preview_image(self.processed_image)
-
-    def download_image(self):
-        """文件模块:下载图片
-        输入参数: 无
-        返回值: 无
-        功能描述: 保存处理后的图像到文件
-        """
-        if self.processed_image:
-            file_path = filedialog.asksaveasfilename(defaultextension=".png")
-            if file_path:
-                self.processed_image.save(file_path, quality=95)
-                print(f"图片已保存到: {file_path}")
+        if event.widget is self:
+            self.preview_worker.close()
 
     def display_preview_image(self, image):
         """显示模块:显示预览图
@@ -517,6 +602,9 @@ class ImageEnhanceWindow(tk.Toplevel):
             self.display_original_image()
         if self.processed_image:
             self.display_preview_image(self.processed_image)
+        # 预览区域尺寸变化后按新尺寸重新生成代理图预览
+        if self.preview_size is not None and self.preview_area_size() != self.preview_size:
+            self.schedule_preview()
 
     def on_paned_drag(self, event):
         """事件模块:分割线拖动
@@ -533,10 +621,16 @@ class ImageEnhanceWindow(tk.Toplevel):
         """文件模块:下载图片
         输入参数: 无
         返回值: 无
-        功能描述: 保存处理后的图像到文件
+        功能描述: 按原图分辨率重新处理后保存到文件（预览只是代理图）
         """
-        if self.processed_image:
+        if self.original_image:
             file_path = filedialog.asksaveasfilename(defaultextension=".png")
             if file_path:
-                self.processed_image.save(file_path, quality=95)
+                self.config(cursor="watch")
+                self.update_idletasks()
+                try:
+                    image = self.render_preview(self.original_image, self.snapshot_params())
+                finally:
+                    self.config(cursor="")
+                image.save(file_path, quality=95)
                 print(f"图片已保存到: {file_path}")
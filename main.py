@@ -1,16 +1,29 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, scrolledtext, messagebox
-import markdown  # 确保已安装markdown库: pip install markdown
 from tkhtmlview import HTMLLabel
-from utils.api_utils import call_data_recognition_api, call_ai_assistant_api
-from calculator import open_calculator
+from chat_view import ChatRenderer
+from utils.api_utils import CancelToken, call_data_recognition_api, call_ai_assistant_api
 from experiment_selection import ExperimentSelectionWindow
-from drawing_interface import PlottingApp
-from image_enhance import ImageEnhanceWindow
+from batch_recognition import BatchRecognitionWindow
+from metrics_panel import MetricsPanelWindow
+from utils.ui_channel import CoalescingChannel
+from utils.conversation_store import ConversationStore
+import importlib
 import threading
-import time
-from queue import Queue
 import os
+import time
+
+# 主窗口空闲后在后台预先导入的重型依赖，加快首次打开工具窗口
+PREWARM_MODULES = [
+    "numpy",
+    "PIL.Image",
+    "cv2",
+    "scipy.interpolate",
+    "matplotlib",
+    "httpx",
+    "openai",
+]
+PREWARM_DELAY_MS = 1000
 
 class MainApplication(tk.Tk):
     def __init__(self):
@@ -19,35 +32,44 @@ class MainApplication(tk.Tk):
         self.geometry("1200x700")
         self.configure(bg="#f0f0f0")
 
-        # 用于存储当前HTML内容和消息历史
-        self.data_recognition_html = ""
-        self.ai_response_html = ""
-        self.data_messages = []  # 存储图片识别对话历史
-        self.ai_messages = []    # 存储AI助手对话历史
+        # 持久化的对话记录：启动时只加载最近的若干条，更早的在滚动到顶部时分页加载
+        self.HISTORY_PAGE_SIZE = 20
+        self.conversation_store = ConversationStore()
+        self.oldest_history_id = {}
+        self.data_messages = self.load_recent_history("data")  # 存储图片识别对话历史
+        self.ai_messages = self.load_recent_history("ai")      # 存储AI助手对话历史
 
-        # 双缓冲变量
-        self.data_buffer = ""
-        self.ai_buffer = ""
-        
-        # 消息队列用于线程间通信
-        self.data_message_queue = Queue()
-        self.ai_message_queue = Queue()
-        
-        # 上次更新时间
-        self.last_data_update = 0
-        self.last_ai_update = 0
-        
-        # 最小更新间隔（毫秒）
-        self.MIN_UPDATE_INTERVAL = 100  
+        # 界面刷新帧率上限
+        self.MAX_UPDATE_FPS = 10
+
+        # 后台线程通过合并更新通道唤醒界面刷新，空闲时不轮询
+        self.update_channel = CoalescingChannel(self, self.on_channel_update, max_fps=self.MAX_UPDATE_FPS)
 
         # 标志变量，用于记录是否为第一次发送消息
         self.first_data_query = True
         self.first_ai_query = True
 
+        # 从识别结果中提取出的数值表格（最新的在最后）
+        self.data_tables = []
+
         # 当前处理状态
         self.is_processing_data = False
         self.is_processing_ai = False
 
+        # 正在进行的请求的取消令牌
+        self.data_cancel_token = None
+        self.ai_cancel_token = None
+        self.request_lock = threading.Lock()
+        # 请求工作线程（包括已被替换、仍在收尾的线程），关闭窗口时等待它们结束
+        self.worker_threads = []
+        self.CLOSE_TIMEOUT = 5.0
+
+        # 替换策略：处理中收到新请求时，取消旧请求并开始新请求
+        self.SUPERSEDE_RUNNING = True
+        self.STOPPED_NOTE = "\n\n*（已停止生成）*"
+        # 接口调用失败时回复中的提示文字，失败的回复不作为上下文发送
+        self.API_FAILURE_TEXT = "API调用失败："
+
         # 左侧工具栏
         self.toolbar = ttk.Frame(self, width=100, style="Toolbar.TFrame")
         self.toolbar.pack(side=tk.LEFT, fill=tk.Y)
@@ -64,9 +86,18 @@ class MainApplication(tk.Tk):
 
         # 设置样式
         self.init_styles()
-        
-        # 启动消息处理循环
-        self.after(100, self.process_message_queues)
+
+        # 显示启动时加载的历史消息
+        self.update_data_display()
+        self.update_ai_display()
+
+        # 关闭窗口时写完尚未保存的消息
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # 工具窗口的重型依赖在首次打开时才导入；主窗口空闲后在后台预热
+        self.ENABLE_PREWARM = True
+        if self.ENABLE_PREWARM:
+            self.after_idle(lambda: self.after(PREWARM_DELAY_MS, self.start_prewarm))
 
     def init_styles(self):
         # 自定义样式
@@ -114,7 +145,7 @@ class MainApplication(tk.Tk):
         btn_advanced_calculator = ttk.Button(
             self.toolbar,
             text="高级计算器",
-            command=lambda: open_calculator(self),
+            command=self.open_calculator,
             style="Toolbar.TButton"
         )
         btn_advanced_calculator.pack(pady=10, padx=5, fill=tk.X)
@@ -128,6 +159,15 @@ class MainApplication(tk.Tk):
         )
         btn_smart_drawing.pack(pady=10, padx=5, fill=tk.X)
 
+        # 接口性能统计按钮
+        btn_metrics = ttk.Button(
+            self.toolbar,
+            text="性能统计",
+            command=self.open_metrics_panel,
+            style="Toolbar.TButton"
+        )
+        btn_metrics.pack(pady=10, padx=5, fill=tk.X)
+
     def init_main_frame(self):
         # 分割主界面为左右两部分
         self.paned_window = ttk.PanedWindow(self.main_frame, orient=tk.HORIZONTAL)
@@ -156,8 +196,18 @@ class MainApplication(tk.Tk):
         dialog_label.pack(pady=10)
 
         # 上传图片按钮
-        btn_upload = ttk.Button(self.data_recognition_frame, text="添加图片", command=self.upload_image)
-        btn_upload.pack(pady=10)
+        upload_frame = ttk.Frame(self.data_recognition_frame, style="Dialog.TFrame")
+        upload_frame.pack(pady=10)
+        btn_upload = ttk.Button(upload_frame, text="添加图片", command=self.upload_image)
+        btn_upload.pack(side=tk.LEFT, padx=5)
+
+        # 批量识别按钮
+        btn_batch = ttk.Button(upload_frame, text="批量识别", command=self.open_batch_recognition)
+        btn_batch.pack(side=tk.LEFT, padx=5)
+
+        # 将识别出的数据表格送入绘图工具
+        btn_plot_table = ttk.Button(upload_frame, text="数据送绘图", command=self.plot_extracted_table)
+        btn_plot_table.pack(side=tk.LEFT, padx=5)
 
         # 显示识别结果的HTMLLabel
         self.data_recognition_text = HTMLLabel(
@@ -167,6 +217,10 @@ class MainApplication(tk.Tk):
             font=("Arial", 10)
         )
         self.data_recognition_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        self.data_renderer = ChatRenderer(
+            self.data_recognition_text,
+            history_loader=lambda: self.load_older_history("data")
+        )
 
         # 输入框和发送按钮的容器
         self.data_input_frame = ttk.Frame(self.data_recognition_frame, style="Input.TFrame")
@@ -191,6 +245,10 @@ class MainApplication(tk.Tk):
         data_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.data_entry.config(yscrollcommand=data_scrollbar.set)
 
+        # 停止按钮
+        btn_stop = ttk.Button(self.data_input_frame, text="停止", command=lambda: self.stop_request("data"))
+        btn_stop.pack(side=tk.RIGHT, padx=5, pady=5)
+
         # 发送按钮
         btn_send = ttk.Button(self.data_input_frame, text="发送", command=self.send_data_query)
         btn_send.pack(side=tk.RIGHT, padx=5, pady=5)
@@ -213,6 +271,10 @@ class MainApplication(tk.Tk):
             font=("Arial", 10)
         )
         self.ai_response_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.ai_renderer = ChatRenderer(
+            self.ai_response_text,
+            history_loader=lambda: self.load_older_history("ai")
+        )
 
         # 输入框和发送按钮的容器
         self.ai_input_frame = ttk.Frame(self.ai_assistant_frame, style="Input.TFrame")
@@ -237,6 +299,10 @@ class MainApplication(tk.Tk):
         ai_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.ai_entry.config(yscrollcommand=ai_scrollbar.set)
 
+        # 停止按钮
+        btn_stop = ttk.Button(self.ai_input_frame, text="停止", command=lambda: self.stop_request("ai"))
+        btn_stop.pack(side=tk.RIGHT, padx=5, pady=5)
+
         # 发送按钮
         btn_send = ttk.Button(self.ai_input_frame, text="发送", command=self.send_ai_query)
         btn_send.pack(side=tk.RIGHT, padx=5, pady=5)
@@ -248,43 +314,46 @@ class MainApplication(tk.Tk):
             self.process_image_recognition(file_path)
 
     def process_image_recognition(self, file_path):
-        if self.is_processing_data:
+        if not self.begin_request("data"):
             return  # 正在处理中，不重复处理
         
-        self.is_processing_data = True
-        self.data_recognition_html = ""
-        
-        # 添加用户消息到历史
-        user_message = f"用户：上传了图片 {os.path.basename(file_path)}"
-        self.data_messages.append({"role": "user", "content": user_message})
-        self.update_data_display(force=True)
+        # 添加用户消息和回复容器到历史，回复结束时一起保存
+        user_message = {"role": "user", "content": f"用户：上传了图片 {os.path.basename(file_path)}"}
+        reply = self.begin_reply("data", user_message)
+        self.update_data_display()
         
         # 开始流式响应
-        threading.Thread(target=self._process_image_recognition_thread, args=(file_path,)).start()
+        self.start_worker(self._process_image_recognition_thread, file_path, self.data_cancel_token,
+                          user_message, reply)
 
-    def _process_image_recognition_thread(self, file_path):
+    def _process_image_recognition_thread(self, file_path, cancel_token, user_message, reply):
+        error_message = None
         try:
-            # 创建新的AI回复容器
-            self.current_ai_response = ""
-            self.data_messages.append({"role": "ai", "content": ""})
-            
-            for chunk in call_data_recognition_api(file_path):
-                self.current_ai_response += chunk
-                # 更新最后一条消息
-                self.data_messages[-1]["content"] = self.current_ai_response
-                # 将更新请求放入队列，而不是直接更新
-                self.data_message_queue.put("update")
-                time.sleep(0.01)  # 控制更新频率
-                
-            # 处理完成，强制更新一次
-            self.data_message_queue.put("update_force")
+            # 边接收边解析数值表格，每次只处理新到达的文本
+            from utils.table_extractor import IncrementalTableParser
+            table_parser = IncrementalTableParser()
+
+            for chunk in call_data_recognition_api(file_path, cancel_token):
+                reply["content"] += chunk
+                self.data_tables.extend(table_parser.feed(chunk))
+                # 通知界面有新内容，多次通知会合并为一次刷新
+                self.update_channel.notify("data")
+            if cancel_token.cancelled:
+                reply["content"] += self.STOPPED_NOTE
+            else:
+                # 流结束时收尾，只加入最后才完成的表格
+                finished_count = len(table_parser.tables)
+                table_parser.finish()
+                self.data_tables.extend(table_parser.tables[finished_count:])
                 
         except Exception as e:
-            error_msg = f"处理出错: {str(e)}"
-            self.data_messages.append({"role": "system", "content": error_msg})
-            self.data_message_queue.put("update_force")
+            error_message = {"role": "system", "content": f"处理出错: {str(e)}"}
+            self.data_messages.append(error_message)
         finally:
-            self.is_processing_data = False
+            # 处理完成，固化并保存该轮消息，强制更新一次
+            self.finish_reply("data", user_message, reply, error_message)
+            self.finish_request("data", cancel_token)
+            self.update_channel.notify("data", force=True)
 
     def send_data_query(self):
         query = self.data_entry.get("1.0", tk.END).strip()
@@ -295,155 +364,222 @@ class MainApplication(tk.Tk):
     def send_ai_query(self):
         query = self.ai_entry.get("1.0", tk.END).strip()
         if query:
-            if self.is_processing_ai:
+            if not self.begin_request("ai"):
                 return  # 正在处理中，不重复处理
-                
-            self.is_processing_ai = True
-            self.ai_response_html = ""
+
+            # 在加入本轮问题之前整理历史对话，作为多轮上下文
+            history = self.build_ai_history()
+            # 只有本次会话中已有问答时才算追问，恢复的历史不影响模型选择
+            follow_up = any(
+                message["role"] == "user" and not message.get("restored") for message in self.ai_messages
+            )
             
-            # 添加用户消息到历史
-            user_message = f"用户：{query}"
-            self.ai_messages.append({"role": "user", "content": user_message})
-            self.update_ai_display(force=True)
+            # 添加用户消息和回复容器到历史，回复结束时一起保存
+            user_message = {"role": "user", "content": f"用户：{query}"}
+            reply = self.begin_reply("ai", user_message)
+            self.update_ai_display()
             
             # 开始流式响应
-            threading.Thread(target=self._process_ai_response_thread, args=(query,)).start()
+            self.start_worker(self._process_ai_response_thread, query, self.ai_cancel_token, history, follow_up,
+                              user_message, reply)
             self.ai_entry.delete("1.0", tk.END)
 
-    def _process_ai_response_thread(self, query):
+    def build_ai_history(self):
+        """将智能助手的对话历史整理为接口所需的多轮消息（跳过失败的回复和停止提示）"""
+        history = []
+        for message in self.ai_messages:
+            if message.get("streaming") or not message["content"]:
+                continue
+            if message["role"] == "user":
+                history.append({"role": "user", "content": message["content"].removeprefix("用户：")})
+            elif message["role"] == "ai" and self.API_FAILURE_TEXT not in message["content"]:
+                content = message["content"].removesuffix(self.STOPPED_NOTE)
+                history.append({"role": "assistant", "content": content})
+        return history
+
+    def _process_ai_response_thread(self, query, cancel_token, history, follow_up, user_message, reply):
+        error_message = None
         try:
-            # 创建新的AI回复容器
-            self.current_ai_response = ""
-            self.ai_messages.append({"role": "ai", "content": ""})
-            
-            for chunk in call_ai_assistant_api(query):
-                self.current_ai_response += chunk
-                # 更新最后一条消息
-                self.ai_messages[-1]["content"] = self.current_ai_response
-                # 将更新请求放入队列
-                self.ai_message_queue.put("update")
-                time.sleep(0.01)  # 控制更新频率
-                
-            # 处理完成，强制更新一次
-            self.ai_message_queue.put("update_force")
+            for chunk in call_ai_assistant_api(query, cancel_token, history, follow_up):
+                reply["content"] += chunk
+                # 通知界面有新内容，多次通知会合并为一次刷新
+                self.update_channel.notify("ai")
+            if cancel_token.cancelled:
+                reply["content"] += self.STOPPED_NOTE
                 
         except Exception as e:
-            error_msg = f"处理出错: {str(e)}"
-            self.ai_messages.append({"role": "system", "content": error_msg})
-            self.ai_message_queue.put("update_force")
+            error_message = {"role": "system", "content": f"处理出错: {str(e)}"}
+            self.ai_messages.append(error_message)
         finally:
-            self.is_processing_ai = False
-
-    def update_data_display(self, force=False):
-        current_time = time.time() * 1000  # 转换为毫秒
-        
-        # 如果不是强制更新，检查是否达到最小更新间隔
-        if not force and (current_time - self.last_data_update < self.MIN_UPDATE_INTERVAL):
+            # 处理完成，固化并保存该轮消息，强制更新一次
+            self.finish_reply("ai", user_message, reply, error_message)
+            self.finish_request("ai", cancel_token)
+            self.update_channel.notify("ai", force=True)
+
+    def begin_reply(self, pane, user_message):
+        """函数模块名称: 开始一轮对话
+        输入参数:
+            pane - 对话框名称（"data"或"ai"）
+            user_message - 用户消息
+        返回值: 回复容器，工作线程直接持有引用，避免被新请求的消息干扰
+        功能描述: 在主线程中同时加入用户消息和回复容器，使回复紧跟在问题之后；
+                 streaming标记表示回复仍在输出，渲染器会在每次刷新时重新渲染它
+        """
+        reply = {"role": "ai", "content": "", "streaming": True}
+        getattr(self, f"{pane}_messages").extend((user_message, reply))
+        return reply
+
+    def finish_reply(self, pane, user_message, reply, error_message=None):
+        """固化回复，并把问题、回复和错误信息作为一组保存（空回复不保存）
+
+        整轮一起保存，被新请求替换的回复较晚结束时也不会与下一轮的问题交错。
+        """
+        reply.pop("streaming", None)
+        messages = [message for message in (user_message, reply, error_message)
+                    if message is not None and message["content"]]
+        self.conversation_store.extend(pane, messages)
+
+    def load_recent_history(self, pane):
+        """读取对话框最近的历史消息"""
+        rows = self.conversation_store.load_recent(pane, self.HISTORY_PAGE_SIZE)
+        self.oldest_history_id[pane] = rows[0]["id"] if rows else None
+        return self._restored_messages(rows)
+
+    def load_older_history(self, pane):
+        """分页读取更早的历史消息插入到消息列表开头并返回，供渲染器滚动到顶部时调用"""
+        oldest_id = self.oldest_history_id.get(pane)
+        if oldest_id is None:
+            return []
+        rows = self.conversation_store.load_before(pane, oldest_id, self.HISTORY_PAGE_SIZE)
+        self.oldest_history_id[pane] = rows[0]["id"] if rows else None
+        older = self._restored_messages(rows)
+        getattr(self, f"{pane}_messages")[0:0] = older
+        return older
+
+    def _restored_messages(self, rows):
+        """存储中的记录转换为消息，restored标记表示来自以前的会话"""
+        return [{"role": row["role"], "content": row["content"], "restored": True} for row in rows]
+
+    def begin_request(self, pane):
+        """函数模块名称: 开始新请求
+        输入参数: pane - 对话框名称（"data"或"ai"）
+        返回值: 是否可以开始新请求
+        功能描述: 按替换策略取消正在进行的请求，并为新请求创建取消令牌
+        """
+        with self.request_lock:
+            if getattr(self, f"is_processing_{pane}"):
+                if not self.SUPERSEDE_RUNNING:
+                    return False
+                getattr(self, f"{pane}_cancel_token").cancel()
+            setattr(self, f"{pane}_cancel_token", CancelToken())
+            setattr(self, f"is_processing_{pane}", True)
+        return True
+
+    def finish_request(self, pane, cancel_token):
+        """请求结束时清除处理状态（已被新请求替换时不做处理）"""
+        with self.request_lock:
+            if getattr(self, f"{pane}_cancel_token") is cancel_token:
+                setattr(self, f"{pane}_cancel_token", None)
+                setattr(self, f"is_processing_{pane}", False)
+
+    def stop_request(self, pane):
+        """停止按钮：取消对话框中正在进行的请求"""
+        with self.request_lock:
+            cancel_token = getattr(self, f"{pane}_cancel_token")
+        if cancel_token is not None:
+            cancel_token.cancel()
+
+    def on_channel_update(self, key, force):
+        # 由合并更新通道在主线程中调用
+        if key == "data":
+            self.update_data_display()
+        elif key == "ai":
+            self.update_ai_display()
+
+    def update_data_display(self):
+        # 已完成的消息只渲染一次，仅重新渲染正在流式输出的消息
+        self.data_renderer.refresh(self.data_messages)
+
+    def update_ai_display(self):
+        # 已完成的消息只渲染一次，仅重新渲染正在流式输出的消息
+        self.ai_renderer.refresh(self.ai_messages)
+
+    def start_worker(self, target, *args):
+        """启动请求工作线程并记录，已结束的线程从记录中移除"""
+        self.worker_threads = [thread for thread in self.worker_threads if thread.is_alive()]
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        self.worker_threads.append(thread)
+        thread.start()
+
+    def on_close(self):
+        """关闭窗口：取消进行中的请求，等工作线程保存最后的消息后再关闭存储"""
+        with self.request_lock:
+            tokens = [self.data_cancel_token, self.ai_cancel_token]
+        for cancel_token in tokens:
+            if cancel_token is not None:
+                cancel_token.cancel()
+        self.withdraw()
+        self._finish_close(time.monotonic() + self.CLOSE_TIMEOUT)
+
+    def _finish_close(self, deadline):
+        # 不在主线程中join：工作线程收尾时会通知界面，需要事件循环继续运行
+        if any(thread.is_alive() for thread in self.worker_threads) and time.monotonic() < deadline:
+            self.after(50, self._finish_close, deadline)
             return
-            
-        self.last_data_update = current_time
-        
-        # 构建HTML内容，区分不同消息
-        html = ""
-        for message in self.data_messages:
-            if message["role"] == "user":
-                html += f'<div style="background-color: #e6f7ff; padding: 8px; margin: 5px; border-radius: 5px;">'
-                html += f'<p style="font-weight: bold; margin: 0;">用户</p>'
-                html += f'<p style="margin: 0;">{message["content"]}</p>'
-                html += '</div>'
-            elif message["role"] == "ai":
-                # 将Markdown转换为HTML
-                markdown_content = message["content"]
-                html_content = markdown.markdown(markdown_content)
-                
-                html += f'<div style="background-color: #f0f0f0; padding: 8px; margin: 5px; border-radius: 5px;">'
-                html += f'<p style="font-weight: bold; margin: 0;">AI</p>'
-                html += f'<div style="margin: 0;">{html_content}</div>'
-                html += '</div>'
-            elif message["role"] == "system":
-                html += f'<div style="background-color: #ffe6e6; padding: 8px; margin: 5px; border-radius: 5px;">'
-                html += f'<p style="font-weight: bold; margin: 0;">系统</p>'
-                html += f'<p style="margin: 0;">{message["content"]}</p>'
-                html += '</div>'
-        
-        self.data_recognition_html = html
-        
-        # 使用双缓冲技术减少闪烁
-        self.data_buffer = html
-        self.data_recognition_text.set_html(self.data_buffer)
-        self.update_idletasks()
+        self.conversation_store.close()
+        self.destroy()
 
-    def update_ai_display(self, force=False):
-        current_time = time.time() * 1000  # 转换为毫秒
-        
-        # 如果不是强制更新，检查是否达到最小更新间隔
-        if not force and (current_time - self.last_ai_update < self.MIN_UPDATE_INTERVAL):
-            return
-            
-        self.last_ai_update = current_time
-        
-        # 构建HTML内容，区分不同消息
-        html = ""
-        for message in self.ai_messages:
-            if message["role"] == "user":
-                html += f'<div style="background-color: #e6f7ff; padding: 8px; margin: 5px; border-radius: 5px;">'
-                html += f'<p style="font-weight: bold; margin: 0;">用户</p>'
-                html += f'<p style="margin: 0;">{message["content"]}</p>'
-                html += '</div>'
-            elif message["role"] == "ai":
-                # 将Markdown转换为HTML
-                markdown_content = message["content"]
-                html_content = markdown.markdown(markdown_content)
-                
-                html += f'<div style="background-color: #f0f0f0; padding: 8px; margin: 5px; border-radius: 5px;">'
-                html += f'<p style="font-weight: bold; margin: 0;">AI</p>'
-                html += f'<div style="margin: 0;">{html_content}</div>'
-                html += '</div>'
-            elif message["role"] == "system":
-                html += f'<div style="background-color: #ffe6e6; padding: 8px; margin: 5px; border-radius: 5px;">'
-                html += f'<p style="font-weight: bold; margin: 0;">系统</p>'
-                html += f'<p style="margin: 0;">{message["content"]}</p>'
-                html += '</div>'
-        
-        self.ai_response_html = html
-        
-        # 使用双缓冲技术减少闪烁
-        self.ai_buffer = html
-        self.ai_response_text.set_html(self.ai_buffer)
-        self.update_idletasks()
-
-    def process_message_queues(self):
-        # 处理数据识别消息队列
-        while not self.data_message_queue.empty():
-            msg = self.data_message_queue.get()
-            if msg == "update":
-                self.update_data_display(force=False)
-            elif msg == "update_force":
-                self.update_data_display(force=True)
-        
-        # 处理AI助手消息队列
-        while not self.ai_message_queue.empty():
-            msg = self.ai_message_queue.get()
-            if msg == "update":
-                self.update_ai_display(force=False)
-            elif msg == "update_force":
-                self.update_ai_display(force=True)
-        
-        # 继续循环处理消息
-        self.after(50, self.process_message_queues)
+    def start_prewarm(self):
+        threading.Thread(target=self._prewarm_modules, name="module-prewarm", daemon=True).start()
+
+    def _prewarm_modules(self):
+        for name in PREWARM_MODULES:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                continue
 
     def open_image_enhance(self):
+        from image_enhance import ImageEnhanceWindow
         ImageEnhanceWindow(self)
 
+    def open_calculator(self):
+        from calculator import open_calculator
+        open_calculator(self)
+
+    def open_batch_recognition(self):
+        BatchRecognitionWindow(self)
+
+    def open_metrics_panel(self):
+        MetricsPanelWindow(self)
+
     def open_experiment_selection(self):
         ExperimentSelectionWindow(self)
 
     def open_drawing_interface(self):
         try:
-            PlottingApp(self)
+            from drawing_interface import PlottingApp
+            return PlottingApp(self)
         except Exception as e:
             messagebox.showerror("错误", f"打开智能绘图窗口时出错: {e}")
 
+    def plot_extracted_table(self):
+        """将最近识别出的表格前两列数据填入绘图工具（跳过序号列，只有一列时作为Y坐标）"""
+        if not self.data_tables:
+            messagebox.showinfo("提示", "识别结果中没有找到数值表格")
+            return
+        from utils.table_extractor import value_columns
+        data = value_columns(self.data_tables[-1])
+        plotting_app = self.open_drawing_interface()
+        if plotting_app is None:
+            return
+        if data.shape[1] >= 2:
+            x_values, y_values = data[:, 0], data[:, 1]
+        else:
+            x_values, y_values = range(1, data.shape[0] + 1), data[:, 0]
+        plotting_app.x_entry.insert(0, " ".join(f"{v:g}" for v in x_values))
+        plotting_app.y_entry.insert(0, " ".join(f"{v:g}" for v in y_values))
+
 
 if __name__ == "__main__":
     app = MainApplication()
@@ -0,0 +1,65 @@
+import tkinter as tk
+from tkinter import ttk
+
+from utils.api_utils import get_response_cache_stats
+from utils.telemetry import load_records, summarize
+
+# 表格列：(汇总字段, 列标题, 显示格式)
+COLUMNS = [
+    ("count", "请求数", "{:d}"),
+    ("errors", "错误数", "{:d}"),
+    ("cancelled", "取消数", "{:d}"),
+    ("connect_s_p50", "连接p50(s)", "{:.2f}"),
+    ("connect_s_p95", "连接p95(s)", "{:.2f}"),
+    ("ttft_s_p50", "首字p50(s)", "{:.2f}"),
+    ("ttft_s_p95", "首字p95(s)", "{:.2f}"),
+    ("total_s_p50", "总耗时p50(s)", "{:.2f}"),
+    ("total_s_p95", "总耗时p95(s)", "{:.2f}"),
+    ("tokens_per_s_p50", "速度p50(tok/s)", "{:.1f}"),
+    ("tokens_per_s_p95", "速度p95(tok/s)", "{:.1f}"),
+]
+
+
+class MetricsPanelWindow(tk.Toplevel):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("接口性能统计")
+        self.geometry("1100x300")
+        self.configure(bg="#f0f0f0")
+
+        top_frame = ttk.Frame(self)
+        top_frame.pack(fill=tk.X, padx=10, pady=10)
+        ttk.Button(top_frame, text="刷新", command=self.refresh).pack(side=tk.LEFT)
+        # 回复缓存的命中统计只在内存中累计，显示本次运行的数据
+        self.cache_label = ttk.Label(top_frame)
+        self.cache_label.pack(side=tk.LEFT, padx=10)
+
+        self.table = ttk.Treeview(self, columns=[key for key, _, _ in COLUMNS])
+        self.table.heading("#0", text="模型")
+        self.table.column("#0", width=220)
+        for key, title, _ in COLUMNS:
+            self.table.heading(key, text=title)
+            self.table.column(key, width=85, anchor=tk.CENTER)
+        self.table.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+
+        self.refresh()
+
+    def refresh(self):
+        """显示模块:刷新统计
+        输入参数: 无
+        返回值: 无
+        功能描述: 重新读取指标文件并按模型显示p50/p95，同时显示回复缓存命中情况
+        """
+        cache = get_response_cache_stats()
+        self.cache_label.config(
+            text=f"回复缓存（本次运行）：命中 {cache['hits']} 次，未命中 {cache['misses']} 次，"
+                 f"命中率 {cache['hit_rate']:.0%}"
+        )
+
+        self.table.delete(*self.table.get_children())
+        for model, stats in sorted(summarize(load_records()).items()):
+            values = [
+                "-" if stats[key] is None else fmt.format(stats[key])
+                for key, _, fmt in COLUMNS
+            ]
+            self.table.insert("", tk.END, text=model, values=values)
@@ -0,0 +1,24 @@
+import io
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from utils.image_utils import prepare_image_for_upload
+
+
+def test_large_image_is_resized_and_reencoded():
+    buffer = io.BytesIO()
+    Image.new("RGB", (3200, 100), "white").save(buffer, format="PNG")
+    data, mime_type = prepare_image_for_upload(buffer.getvalue(), "photo.png")
+    assert mime_type == "image/jpeg"
+    assert max(Image.open(io.BytesIO(data)).size) == 1600
+
+
+@pytest.mark.parametrize("filename, expected", [
+    ("photo.bmp", "image/bmp"),
+    ("photo.unknown", "image/jpeg"),
+    (None, "image/jpeg"),
+])
+def test_undecodable_image_is_uploaded_unchanged(filename, expected):
+    assert prepare_image_for_upload(b"not an image", filename) == (b"not an image", expected)
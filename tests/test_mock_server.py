@@ -0,0 +1,53 @@
+import argparse
+import asyncio
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("openai")
+
+from benchmarks.mock_server import FaultState, make_handler
+from utils import api_utils
+from utils.resilience import CircuitBreaker, RetryPolicy
+
+
+@pytest.fixture
+def mock_server(monkeypatch):
+    def start(**options):
+        args = argparse.Namespace(fail_first=0, fail_rate=0.0, fail_status=503, drop_after=None, chunk_delay=0)
+        for name, value in options.items():
+            setattr(args, name, value)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(FaultState(args)))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        # 每个测试使用独立的客户端和重试状态
+        monkeypatch.setattr(api_utils, "_client", None)
+        monkeypatch.setattr(api_utils, "BASE_URL", f"http://127.0.0.1:{server.server_port}")
+        monkeypatch.setattr(api_utils, "_retry_policy", RetryPolicy(max_attempts=3, base_delay=0))
+        monkeypatch.setattr(api_utils, "_circuit_breaker", CircuitBreaker(failure_threshold=10))
+        monkeypatch.setattr(api_utils, "_rate_limiter", None)
+        return args
+
+    servers = []
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def run_stream():
+    async def run():
+        return "".join([chunk async for chunk in api_utils._stream_live("mock", [{"role": "user", "content": "hi"}])])
+    return asyncio.run(run())
+
+
+def test_recovers_from_failures_before_first_token(mock_server):
+    mock_server(fail_first=2)
+    assert run_stream().startswith("这是模拟服务器的回复")
+
+
+def test_dropped_stream_is_reported_as_error(mock_server):
+    mock_server(drop_after=3)
+    with pytest.raises(Exception):
+        run_stream()
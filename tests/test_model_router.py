@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from utils import api_utils, model_router
+from utils.model_router import FULL, LIGHT, LOCAL, evaluate_expression, evaluate_statistics, route
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("1+2*3", 7),
+    ("计算 (1.2+3)^2 等于多少？", 17.64),
+    ("2×3÷4", 1.5),
+])
+def test_arithmetic_is_evaluated_locally(query, expected):
+    assert evaluate_expression(query) == pytest.approx(expected)
+    assert route(query)[0] == LOCAL
+
+
+@pytest.mark.parametrize("query", ["2024", "9^9^9", "__import__('os')", "1/0"])
+def test_non_arithmetic_is_not_evaluated(query):
+    assert evaluate_expression(query) is None
+
+
+@pytest.mark.parametrize("query", ["(10^100)^4", "10^100*10^100*10^100*10^100", "1e308*10"])
+def test_results_beyond_float_range_are_not_evaluated(query):
+    assert evaluate_expression(query) is None
+    assert route(query)[0] != LOCAL
+
+
+def test_statistics_use_sample_standard_deviation():
+    results = dict(evaluate_statistics("计算 1.2 1.3 1.25 的平均值和标准差"))
+    assert results["平均数"] == pytest.approx(1.25)
+    assert results["标准差"] == pytest.approx(0.05)
+
+
+def test_short_question_goes_to_light_model():
+    assert route("牛顿环实验的原理是什么") == (LIGHT, None)
+
+
+def test_follow_up_goes_to_full_model():
+    assert route("牛顿环实验的原理是什么", follow_up=True) == (FULL, None)
+
+
+def test_data_analysis_goes_to_full_model():
+    assert route("计算 1.2 1.3 的误差并分析原因") == (FULL, None)
+
+
+def test_routing_errors_are_reported_as_failed_replies(monkeypatch):
+    def fail(query, follow_up=False):
+        raise RuntimeError("路由出错")
+
+    routes = []
+    monkeypatch.setattr(model_router, "route", fail)
+    monkeypatch.setattr(api_utils, "log_route", lambda *args, **kwargs: routes.append(args))
+
+    async def run():
+        return [chunk async for chunk in api_utils.acall_ai_assistant_api("1+1")]
+
+    assert asyncio.run(run()) == ["API调用失败：路由出错"]
+    assert len(routes) == 1
@@ -0,0 +1,61 @@
+import asyncio
+
+from utils.rate_limiter import BATCH, INTERACTIVE, RateLimiter
+
+
+def test_interactive_requests_go_before_batch_and_fifo_within_priority():
+    async def run():
+        limiter = RateLimiter(requests_per_minute=1200, tokens_per_minute=10 ** 6)  # 每秒20个
+        limiter._requests.level = 0
+        order = []
+
+        async def request(name, priority):
+            await limiter.acquire(1, priority)
+            order.append(name)
+
+        await asyncio.gather(
+            request("b1", BATCH), request("b2", BATCH),
+            request("i1", INTERACTIVE), request("i2", INTERACTIVE),
+        )
+        return order
+
+    assert asyncio.run(run()) == ["i1", "i2", "b1", "b2"]
+
+
+def test_cancelled_head_does_not_block_queue():
+    async def run():
+        loop = asyncio.get_running_loop()
+        limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=600)  # 每秒10个token
+        limiter._tokens.level = 0
+        start = loop.time()
+
+        head = asyncio.ensure_future(limiter.acquire(600))
+        small = asyncio.ensure_future(limiter.acquire(1))
+        await asyncio.sleep(0.05)
+        head.cancel()
+        await asyncio.wait_for(small, timeout=2)
+        return loop.time() - start, limiter.pending
+
+    elapsed, pending = asyncio.run(run())
+    assert elapsed < 1
+    assert pending == 0
+
+
+def test_tokens_returned_when_cancelled_after_grant():
+    async def run():
+        limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=1000)
+        limiter._tokens.level = 0
+        task = asyncio.ensure_future(limiter.acquire(400))
+        await asyncio.sleep(0)
+
+        # 令牌补足后分配给该请求，但任务还没恢复执行就被取消
+        limiter._tokens.level = 1000
+        limiter._dispatch()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return limiter._tokens.level
+
+    assert asyncio.run(run()) >= 999
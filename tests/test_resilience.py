@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+from utils.resilience import CircuitBreaker, CircuitOpenError, IncompleteStreamError, RetryPolicy, is_retryable
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+def test_retry_delay_is_bounded_by_backoff_cap():
+    policy = RetryPolicy(base_delay=0.5, max_delay=2.0)
+    for attempt in range(6):
+        delay = policy.delay(attempt)
+        assert 0 <= delay <= min(2.0, 0.5 * 2 ** attempt)
+
+
+def test_retryable_errors():
+    assert is_retryable(StatusError(429))
+    assert is_retryable(StatusError(503))
+    assert is_retryable(IncompleteStreamError())
+    assert not is_retryable(StatusError(400))
+    assert not is_retryable(StatusError(401))
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    for _ in range(2):
+        breaker.before_request()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+def test_breaker_half_open_allows_single_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.before_request()
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    breaker.before_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_request()
+
+
+def test_failed_probe_reopens_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.before_request()
+    breaker.record_failure()
+    time.sleep(0.06)
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
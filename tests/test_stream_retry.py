@@ -0,0 +1,127 @@
+import asyncio
+import contextlib
+from types import SimpleNamespace
+
+import pytest
+
+from utils import api_utils
+from utils.rate_limiter import RateLimiter
+from utils.resilience import CircuitBreaker, CircuitOpenError, IncompleteStreamError, RetryPolicy
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+def make_chunk(content=None, finish_reason=None):
+    delta = SimpleNamespace(content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)])
+
+
+class FakeStream:
+    """模拟SDK返回的流：按顺序产出数据块，遇到异常对象时抛出"""
+
+    def __init__(self, items):
+        self.items = items
+
+    async def __aiter__(self):
+        for item in self.items:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    async def close(self):
+        pass
+
+
+class FakeClient:
+    """每次create()按顺序返回一个预设的结果（流或异常）"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeStream(outcome)
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    def install(outcomes):
+        client = FakeClient(outcomes)
+        monkeypatch.setattr(api_utils, "get_client", lambda: client)
+        monkeypatch.setattr(api_utils, "StreamMetrics", lambda *args: contextlib.nullcontext(
+            SimpleNamespace(mark_connected=lambda: None, add_chunk=lambda content: None)))
+        monkeypatch.setattr(api_utils, "_retry_policy", RetryPolicy(max_attempts=3, base_delay=0))
+        monkeypatch.setattr(api_utils, "_circuit_breaker", CircuitBreaker(failure_threshold=10))
+        monkeypatch.setattr(api_utils, "_rate_limiter", RateLimiter(6000, 10 ** 7))
+        return client
+    return install
+
+
+def collect(agen):
+    async def run():
+        return [chunk async for chunk in agen]
+    return asyncio.run(run())
+
+
+COMPLETE = [make_chunk("你好"), make_chunk("。"), make_chunk(finish_reason="stop")]
+
+
+def test_retries_transient_error_before_first_token(fake_api):
+    client = fake_api([StatusError(503), StatusError(429), COMPLETE])
+    assert collect(api_utils._stream_live("m", [])) == ["你好", "。"]
+    assert client.calls == 3
+
+
+def test_gives_up_after_max_attempts(fake_api):
+    client = fake_api([StatusError(503)] * 3)
+    with pytest.raises(StatusError):
+        collect(api_utils._stream_live("m", []))
+    assert client.calls == 3
+
+
+def test_does_not_retry_client_errors(fake_api):
+    client = fake_api([StatusError(400), COMPLETE])
+    with pytest.raises(StatusError):
+        collect(api_utils._stream_live("m", []))
+    assert client.calls == 1
+
+
+def test_does_not_retry_after_first_token(fake_api):
+    client = fake_api([[make_chunk("你好"), StatusError(503)], COMPLETE])
+    received = []
+
+    async def run():
+        async for chunk in api_utils._stream_live("m", []):
+            received.append(chunk)
+
+    with pytest.raises(StatusError):
+        asyncio.run(run())
+    assert received == ["你好"]
+    assert client.calls == 1
+
+
+def test_stream_without_finish_reason_is_an_error(fake_api):
+    fake_api([[make_chunk("你好")], [make_chunk("你好")], [make_chunk("你好")]])
+    with pytest.raises(IncompleteStreamError):
+        collect(api_utils._stream_live("m", []))
+
+
+def test_open_circuit_does_not_spend_rate_limit(fake_api):
+    fake_api([])
+    breaker = api_utils._circuit_breaker
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    limiter = api_utils._rate_limiter
+    before = limiter._requests.level
+    with pytest.raises(CircuitOpenError):
+        collect(api_utils._stream_live("m", []))
+    assert limiter._requests.level == before
@@ -0,0 +1,63 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from utils.table_extractor import IncrementalTableParser, value_columns
+
+TEXT = (
+    "识别结果如下：\n"
+    "| 次数 | 长度/mm | 质量/g |\n"
+    "|---|---|---|\n"
+    "| 1 | 12.50 | 3.1 |\n"
+    "| 2 | 12.48 | 3.2 |\n"
+    "| 3 | 12.52 | 3.0 |\n"
+    "\n"
+    "温度 电阻\n"
+    "20 1.02\n"
+    "30 1.05\n"
+    "40 1.09"
+)
+
+
+def parse(chunks):
+    parser = IncrementalTableParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.finish()
+
+
+def assert_same_tables(tables, expected):
+    assert len(tables) == len(expected)
+    for table, reference in zip(tables, expected):
+        assert table["header"] == reference["header"]
+        np.testing.assert_array_equal(table["data"], reference["data"])
+
+
+def test_tables_are_extracted():
+    tables = parse([TEXT])
+    assert len(tables) == 2
+    # 数值序号列作为数据保留，表头与列一一对应
+    assert tables[0]["header"] == ["次数", "长度/mm", "质量/g"]
+    assert tables[0]["data"].shape == (3, 3)
+    assert tables[1]["header"] is None
+    assert tables[1]["data"].shape == (3, 2)
+
+
+def test_row_labels_are_dropped():
+    tables = parse(["| 次数 | 长度/mm | 质量/g |\n| 第1次 | 12.50 | 3.1 |\n| 第2次 | 12.48 | 3.2 |\n"])
+    assert tables[0]["header"] == ["长度/mm", "质量/g"]
+    np.testing.assert_array_equal(tables[0]["data"], [[12.50, 3.1], [12.48, 3.2]])
+
+
+def test_value_columns_skip_serial_number_column():
+    tables = parse([TEXT])
+    np.testing.assert_array_equal(value_columns(tables[0]), tables[0]["data"][:, 1:])
+    # 只有两列时首列可能是自变量，不去掉
+    np.testing.assert_array_equal(value_columns(tables[1]), tables[1]["data"])
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 16])
+def test_result_does_not_depend_on_chunk_boundaries(size):
+    expected = parse([TEXT])
+    chunks = [TEXT[i:i + size] for i in range(0, len(TEXT), size)]
+    assert_same_tables(parse(chunks), expected)
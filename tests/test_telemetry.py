@@ -0,0 +1,46 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from utils import telemetry
+from utils.telemetry import StreamMetrics, summarize
+
+
+@pytest.fixture
+def records(monkeypatch):
+    written = []
+    logger = SimpleNamespace(info=lambda line: written.append(json.loads(line)))
+    monkeypatch.setattr(telemetry, "_get_metrics_logger", lambda: logger)
+    return written
+
+
+@pytest.mark.parametrize("exc_type", [asyncio.CancelledError, GeneratorExit])
+def test_cancellation_is_not_recorded_as_error(records, exc_type):
+    with pytest.raises(exc_type):
+        with StreamMetrics("m"):
+            raise exc_type()
+    assert records[0]["error"] is None
+    assert records[0]["cancelled"] is True
+
+
+def test_errors_are_recorded(records):
+    with pytest.raises(ValueError):
+        with StreamMetrics("m"):
+            raise ValueError()
+    assert records[0]["error"] == "ValueError"
+    assert records[0]["cancelled"] is False
+
+
+def test_summary_counts_cancellations_separately():
+    items = [
+        {"model": "m", "ttft_s": 1.0, "total_s": 2.0, "error": None},
+        {"model": "m", "ttft_s": 3.0, "total_s": 0.5, "error": None, "cancelled": True},
+        {"model": "m", "ttft_s": 9.0, "total_s": 9.0, "error": "APIError"},
+    ]
+    stats = summarize(items)["m"]
+    assert (stats["count"], stats["errors"], stats["cancelled"]) == (3, 1, 1)
+    # 取消的请求计入首字延迟，不计入不完整的总耗时
+    assert stats["ttft_s_p95"] == 3.0
+    assert stats["total_s_p95"] == 2.0
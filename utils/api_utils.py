@@ -1,69 +1,440 @@
+import asyncio
 import base64
+import json
 import os
-from openai import OpenAI
+import queue
+import threading
+import time
 
-# 初始化OpenAI客户端
-client = OpenAI(
-    api_key="2aa89cd6-014e-40e3-ac0a-1a45d6df0eae",  # 从环境变量获取API密钥
-    base_url="https://ark.cn-beijing.volces.com/api/v3",  # API基础地址
-)
+from utils.context_budget import DEFAULT_CONTEXT_BUDGET, build_context
+from utils.rate_limiter import INTERACTIVE, RateLimiter, estimate_request_tokens
+from utils.recognition_cache import RecognitionCache, replay_chunks
+from utils.resilience import CircuitBreaker, IncompleteStreamError, RetryPolicy, is_retryable
+from utils.response_cache import ResponseCache
+from utils import model_router, stream_replay
+from utils.telemetry import StreamMetrics, log_route
 
+# API配置，可通过环境变量指向本地模拟服务器进行测试
+API_KEY = os.environ.get("ARK_API_KEY", "2aa89cd6-014e-40e3-ac0a-1a45d6df0eae")
+BASE_URL = os.environ.get("ARK_BASE_URL", "https://ark.cn-beijing.volces.com/api/v3")
 
-def call_data_recognition_api(image_path):
-    """调用视觉多模态API（图片识别）"""
+# 运行模式：live正常请求，record请求并录制回复，replay只回放录制（离线测试和基准测量）
+API_MODE = os.environ.get("ARK_API_MODE", stream_replay.LIVE)
+# 回放倍速，0表示尽快输出
+REPLAY_SPEED = float(os.environ.get("ARK_REPLAY_SPEED", "1"))
+
+# 连接池配置：所有窗口和对话框共享同一组长连接
+MAX_CONNECTIONS = 10
+MAX_KEEPALIVE_CONNECTIONS = 5
+KEEPALIVE_EXPIRY = 60.0
+
+# 客户端限流：同一密钥下所有窗口共享的每分钟请求数和token数上限
+REQUESTS_PER_MINUTE = int(os.environ.get("ARK_RPM", "60"))
+TOKENS_PER_MINUTE = int(os.environ.get("ARK_TPM", "100000"))
+
+VISION_MODEL = "doubao-1-5-vision-pro-32k-250115"
+VISION_PROMPT = "识别并提取图片中的实验数据，将其数字化。如果图片中包含科学仪器，也请识别并描述。回答中不要用到制表符。"
+
+ASSISTANT_MODEL = "deepseek-v3-250324"
+# 简短问答使用的轻量模型，失败时回退到ASSISTANT_MODEL
+LIGHT_ASSISTANT_MODEL = os.environ.get("ARK_LIGHT_MODEL", "doubao-1-5-lite-32k-250115")
+ASSISTANT_PROMPT = "你是专注于物理实验辅助的通用计算助手，负责检查实验数据的合理性并进行计算。常见计算包括标准差、平均数、误差值等。如果不清楚计算内容，请向用户确认。尽量避免出现需要渲染的数学公式，最终计算结果要明显。回复保持简洁。"
+
+_loop = None
+_loop_lock = threading.Lock()
+_client = None
+_recognition_cache = RecognitionCache()
+_response_cache = ResponseCache()
+# 重试在_stream_completion中统一处理，SDK自身的重试关闭
+_retry_policy = RetryPolicy()
+_circuit_breaker = CircuitBreaker()
+_rate_limiter = None
+
+# 流结束标记
+_STREAM_END = object()
+
+
+def get_event_loop():
+    """获取后台事件循环（首次调用时启动循环线程）"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="api-event-loop", daemon=True).start()
+    return _loop
+
+
+def submit(coro):
+    """将协程提交到后台事件循环，返回concurrent.futures.Future"""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+
+
+def configure(base_url=None, api_key=None, mode=None, replay_speed=None):
+    """修改接口地址、密钥或运行模式（例如指向本地模拟服务器），下次请求时重建客户端"""
+    global API_KEY, BASE_URL, API_MODE, REPLAY_SPEED, _client
+    if base_url is not None:
+        BASE_URL = base_url
+    if api_key is not None:
+        API_KEY = api_key
+    if mode is not None:
+        if mode not in stream_replay.MODES:
+            raise ValueError(f"未知的运行模式：{mode}")
+        API_MODE = mode
+    if replay_speed is not None:
+        REPLAY_SPEED = replay_speed
+    _client = None
+
+
+def _use_cache():
+    """只有正常模式读写本地缓存：录制模式要真正发出每个请求，回放模式要按
+    录制的节奏输出，且回放的内容不能混进正常使用的缓存"""
+    return API_MODE == stream_replay.LIVE
+
+
+def get_rate_limiter():
+    """获取共享的请求调度器（只能在后台事件循环中使用）"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter(REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE)
+    return _rate_limiter
+
+
+def get_client():
+    """获取共享的异步客户端（只能在后台事件循环中使用）"""
+    global _client
+    if _client is None:
+        # 首次请求时才导入SDK，避免拖慢程序启动
+        import httpx
+        from openai import AsyncOpenAI
+
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(60.0, connect=10.0),
+        )
+        _client = AsyncOpenAI(api_key=API_KEY, base_url=BASE_URL, http_client=http_client, max_retries=0)
+    return _client
+
+
+class CancelToken:
+    """请求取消令牌
+
+    cancel()可在任意线程调用；已注册的回调会立即执行，
+    用于中断后台事件循环中的HTTP流。
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        """取消请求并执行所有回调"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def add_callback(self, callback):
+        """注册取消回调；若已取消则立即执行"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+
+def iterate_stream(agen, cancel_token=None):
+    """函数模块名称: 异步流转同步迭代
+    输入参数:
+        agen - 异步生成器
+        cancel_token - 可选的取消令牌
+    返回值: 同步生成器，逐块产出agen的内容
+    功能描述: 在后台事件循环中消费异步生成器，调用方线程通过队列取回数据块；
+             令牌被取消或调用方提前结束迭代时取消后台任务，从而关闭HTTP流
+    """
+    chunks = queue.Queue()
+
+    async def pump():
+        try:
+            async for chunk in agen:
+                chunks.put(chunk)
+        finally:
+            await agen.aclose()
+
+    future = submit(pump())
+    # 任务结束或被取消（包括尚未开始执行就被取消）时都会放入结束标记
+    future.add_done_callback(lambda f: chunks.put(_STREAM_END))
+    if cancel_token is not None:
+        cancel_token.add_callback(future.cancel)
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is _STREAM_END:
+                break
+            yield chunk
+        if not future.cancelled():
+            future.result()
+    finally:
+        future.cancel()
+
+
+async def _stream_content(response):
+    """逐块产出流式响应中的文本内容，结束或被取消时释放连接回连接池
+
+    没有收到带finish_reason的结束块就中断的流视为失败，避免截断的回复
+    被当作完整回复缓存或报告为成功。
+    """
+    finished = False
     try:
-        # 将本地图片转换为base64格式
+        async for chunk in response:
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.delta is not None and choice.delta.content is not None:
+                yield choice.delta.content
+            if choice.finish_reason is not None:
+                finished = True
+        if not finished:
+            raise IncompleteStreamError("回复流在结束前中断")
+    finally:
+        await response.close()
+
+
+async def _stream_completion(model, messages, priority=INTERACTIVE, metrics_extra=None):
+    """函数模块名称: 流式对话请求
+    输入参数:
+        model - 模型名称
+        messages - 消息列表
+        priority - 调度优先级
+        metrics_extra - 附加到性能记录中的字段
+    返回值: 异步生成器，逐块产出回复文本
+    功能描述: 按运行模式请求接口、请求并录制，或回放录制的回复
+    """
+    if API_MODE == stream_replay.REPLAY:
+        async for content in stream_replay.replay(model, messages, REPLAY_SPEED):
+            yield content
+        return
+
+    if API_MODE != stream_replay.RECORD:
+        async for content in _stream_live(model, messages, priority, metrics_extra):
+            yield content
+        return
+
+    recorder = stream_replay.StreamRecorder(model, messages)
+    async for content in _stream_live(model, messages, priority, metrics_extra):
+        recorder.add(content)
+        yield content
+    # 只保存完整结束的流
+    recorder.save()
+
+
+async def _stream_live(model, messages, priority=INTERACTIVE, metrics_extra=None):
+    """函数模块名称: 请求接口
+    输入参数:
+        model - 模型名称
+        messages - 消息列表
+        priority - 调度优先级，批量任务使用BATCH
+        metrics_extra - 附加到性能记录中的字段
+    返回值: 异步生成器，逐块产出回复文本
+    功能描述: 使用共享客户端发起流式请求，并记录连接耗时、首字延迟、速度和字节数。
+             在收到第一个文本块之前发生的暂时性故障（限流、5xx、连接错误）按
+             退避策略重试；已输出内容后失败则直接抛出，避免重复文本。
+             连续失败时熔断器打开，期间的请求立即失败。每次发送（含重试）
+             前先检查熔断器，再经过限流调度器排队
+    """
+    request_bytes = len(json.dumps(messages, ensure_ascii=False).encode("utf-8"))
+    request_tokens = estimate_request_tokens(messages)
+    attempt = 0
+    while True:
+        # 首次调用时会导入SDK，放在计时之外，避免计入连接耗时和首字延迟
+        client = get_client()
+        # 先检查熔断再排队，熔断期间快速失败的请求不消耗限流额度
+        _circuit_breaker.before_request()
+        started = False
+        try:
+            await get_rate_limiter().acquire(request_tokens, priority)
+            with StreamMetrics(model, request_bytes, metrics_extra) as metrics:
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    stream=True  # 开启流式响应
+                )
+                metrics.mark_connected()
+
+                async for content in _stream_content(response):
+                    metrics.add_chunk(content)
+                    started = True
+                    yield content
+        except Exception as e:
+            if not is_retryable(e):
+                # 请求本身有误（如4xx），不计入熔断
+                _circuit_breaker.release()
+                raise
+            _circuit_breaker.record_failure()
+            attempt += 1
+            if started or attempt >= _retry_policy.max_attempts:
+                raise
+            await asyncio.sleep(_retry_policy.delay(attempt - 1, e))
+            continue
+        except BaseException:
+            # 被取消时不计入成功或失败
+            _circuit_breaker.release()
+            raise
+        _circuit_breaker.record_success()
+        return
+
+
+async def acall_data_recognition_api(image_path, priority=INTERACTIVE):
+    """调用视觉多模态API（图片识别，异步流式，批量任务的priority为BATCH）"""
+    try:
+        # 图片预处理依赖PIL，首次识别时才导入
+        from utils import image_utils
+
         with open(image_path, "rb") as image_file:
-            base64_image = base64.b64encode(image_file.read()).decode("utf-8")
+            image_bytes = image_file.read()
+
+        # 相同图片、模型、提示词和预处理配置直接回放缓存结果
+        cache_key = RecognitionCache.make_key(
+            image_bytes, VISION_MODEL, VISION_PROMPT,
+            f"{image_utils.MAX_UPLOAD_EDGE}:{image_utils.UPLOAD_FORMAT}:{image_utils.UPLOAD_QUALITY}"
+        )
+        cached = _recognition_cache.get(cache_key) if _use_cache() else None
+        if cached is not None:
+            async for content in replay_chunks(cached):
+                yield content
+            return
+
+        # 缩小并重新编码后转换为base64格式（解码编码较耗时，放到线程池执行）
+        upload_bytes, mime_type = await asyncio.get_running_loop().run_in_executor(
+            None, image_utils.prepare_image_for_upload, image_bytes, image_path
+        )
+        base64_image = base64.b64encode(upload_bytes).decode("utf-8")
 
         # 构造请求体，开启流式响应
-        response = client.chat.completions.create(
-            model="doubao-1-5-vision-pro-32k-250115",  # 模型名称
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text",
-                         "text": "识别并提取图片中的实验数据，将其数字化。如果图片中包含科学仪器，也请识别并描述。回答中不要用到制表符。"},
-                        # 文本提示
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"  # base64格式图片
-                            },
+        messages = [
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": VISION_PROMPT},  # 文本提示
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:{mime_type};base64,{base64_image}"  # base64格式图片
                         },
-                    ],
-                }
-            ],
-            stream=True  # 开启流式响应
-        )
+                    },
+                ],
+            }
+        ]
 
-        for chunk in response:
-            if chunk.choices[0].delta.content is not None:
-                yield chunk.choices[0].delta.content
+        chunks = []
+        # 图片预处理前后的字节数写入性能记录
+        upload_stats = {"image_original_bytes": len(image_bytes), "image_upload_bytes": len(upload_bytes)}
+        async for content in _stream_completion(VISION_MODEL, messages, priority, upload_stats):
+            chunks.append(content)
+            yield content
+
+        # 只缓存完整结束的识别结果
+        if _use_cache():
+            _recognition_cache.put(cache_key, chunks)
     except Exception as e:
         # 处理API调用失败的情况
         yield f"API调用失败：{str(e)}"
 
 
-def call_ai_assistant_api(query):
-    """调用智能助手API（使用官方SDK）"""
+async def acall_ai_assistant_api(query, history=None, context_budget=DEFAULT_CONTEXT_BUDGET, follow_up=None):
+    """调用智能助手API（异步流式，history为此前的多轮对话）
+
+    follow_up表示问题是否为本次会话中的追问，用于路由；为None时按history
+    是否为空判断。从存储中恢复的早期对话只作为上下文，不应算作追问。
+
+    纯算术和简单统计在本地计算；简短问答先用轻量模型，在输出任何内容前
+    失败时回退到完整模型；其余请求直接使用完整模型。路由和耗时写入指标文件。
+    """
+    start = time.perf_counter()
+    first_chunk = None
+    if follow_up is None:
+        follow_up = bool(history)
+    route, model, models = None, None, []
     try:
+        route, answer = model_router.route(query, follow_up)
+        models = {
+            model_router.LIGHT: [LIGHT_ASSISTANT_MODEL, ASSISTANT_MODEL],
+            model_router.FULL: [ASSISTANT_MODEL],
+        }.get(route, [])
+        model = "local" if route == model_router.LOCAL else models[0]
+        if answer is not None:
+            first_chunk = time.perf_counter()
+            yield answer
+            return
+
+        # 历史对话按token预算截断，较早的轮次压缩为摘要
+        context = build_context(history or [], context_budget)
+
         # 开启流式请求
-        response = client.chat.completions.create(
-            model="deepseek-v3-250324",  # 模型名称
-            messages=[
-                {"role": "system",
-                 "content": "你是专注于物理实验辅助的通用计算助手，负责检查实验数据的合理性并进行计算。常见计算包括标准差、平均数、误差值等。如果不清楚计算内容，请向用户确认。尽量避免出现需要渲染的数学公式，最终计算结果要明显。回复保持简洁。"},
-                # 系统提示
-                {"role": "user", "content": query},  # 用户输入
-            ],
-            stream=True  # 开启流式响应
-        )
+        messages = [
+            {"role": "system", "content": ASSISTANT_PROMPT},  # 系统提示
+            *context,  # 历史对话
+            {"role": "user", "content": query},  # 用户输入
+        ]
 
-        for chunk in response:
-            if chunk.choices[0].delta.content is not None:
-                yield chunk.choices[0].delta.content
+        for index, model in enumerate(models):
+            # 重复的问题（且上下文相同）直接回放缓存的回复
+            cache_key = ResponseCache.make_key(
+                query, ASSISTANT_PROMPT, model,
+                json.dumps(context, ensure_ascii=False) if context else ""
+            )
+            cached = _response_cache.get(cache_key) if _use_cache() else None
+            stream = replay_chunks(cached) if cached is not None else _stream_completion(model, messages)
+
+            chunks = []
+            try:
+                async for content in stream:
+                    if first_chunk is None:
+                        first_chunk = time.perf_counter()
+                    chunks.append(content)
+                    yield content
+            except Exception:
+                # 尚未输出内容且还有下一级模型时回退
+                if chunks or index == len(models) - 1:
+                    raise
+                continue
+
+            # 只缓存完整结束的回复
+            if cached is None and _use_cache():
+                _response_cache.put(cache_key, chunks)
+            return
     except Exception as e:
         # 处理API调用失败的情况
-        yield f"API调用失败：{str(e)}"
\ No newline at end of file
+        yield f"API调用失败：{str(e)}"
+    finally:
+        log_route(
+            route, model, time.perf_counter() - start,
+            None if first_chunk is None else first_chunk - start,
+            fallback=model != models[0] if models else False,
+        )
+
+
+def call_data_recognition_api(image_path, cancel_token=None):
+    """调用视觉多模态API（图片识别）"""
+    return iterate_stream(acall_data_recognition_api(image_path), cancel_token)
+
+
+def call_ai_assistant_api(query, cancel_token=None, history=None, follow_up=None):
+    """调用智能助手API（使用官方SDK）"""
+    return iterate_stream(acall_ai_assistant_api(query, history, follow_up=follow_up), cancel_token)
+
+
+def get_response_cache_stats():
+    """获取智能助手回复缓存的命中统计"""
+    return _response_cache.stats()
@@ -0,0 +1,64 @@
+import re
+
+DEFAULT_CONTEXT_BUDGET = 2000  # 历史对话可占用的token上限
+MESSAGE_OVERHEAD = 4           # 每条消息的格式开销
+SUMMARY_CHARS = 40             # 摘要中每轮对话保留的字符数
+
+# 中日韩文字及全角符号，每个字符约计一个token
+_CJK_PATTERN = re.compile(r"[　-〿㐀-䶿一-鿿＀-￯]")
+
+
+def estimate_tokens(text):
+    """快速估算文本的token数：中文按字计，其余字符约4个计一个"""
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _message_tokens(message):
+    return estimate_tokens(message["content"]) + MESSAGE_OVERHEAD
+
+
+def _shorten(text, limit=SUMMARY_CHARS):
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def build_context(history, budget=DEFAULT_CONTEXT_BUDGET):
+    """函数模块名称: 构建多轮上下文
+    输入参数:
+        history - 历史消息列表（从旧到新，role为user/assistant）
+        budget - 历史部分的token上限
+    返回值: 可直接放入请求的消息列表
+    功能描述: 从最新一轮开始完整保留，直到超出预算；更早的对话压缩为
+             一条截断摘要，摘要仍放不下时从最旧的开始丢弃
+    """
+    used = 0
+    index = len(history)
+    while index > 0:
+        tokens = _message_tokens(history[index - 1])
+        if used + tokens > budget:
+            break
+        used += tokens
+        index -= 1
+    kept = history[index:]
+
+    older = history[:index]
+    if not older:
+        return list(kept)
+
+    # 更早的对话压缩为摘要，保留最新的若干条
+    lines = []
+    remaining = budget - used - MESSAGE_OVERHEAD - estimate_tokens("此前对话摘要：")
+    for message in reversed(older):
+        speaker = "用户" if message["role"] == "user" else "助手"
+        line = f"- {speaker}：{_shorten(message['content'])}"
+        tokens = estimate_tokens(line) + 1
+        if tokens > remaining:
+            break
+        remaining -= tokens
+        lines.append(line)
+
+    if not lines:
+        return list(kept)
+    summary = "此前对话摘要：\n" + "\n".join(reversed(lines))
+    return [{"role": "system", "content": summary}] + list(kept)
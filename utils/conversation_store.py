@@ -0,0 +1,105 @@
+import os
+import sqlite3
+import threading
+import time
+from queue import Queue
+
+# 对话记录保存在项目根目录下的history目录
+STORE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "history", "conversations.sqlite3")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS messages ("
+    "id INTEGER PRIMARY KEY AUTOINCREMENT, pane TEXT NOT NULL, role TEXT NOT NULL, "
+    "content TEXT NOT NULL, created_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS idx_pane_id ON messages(pane, id)",
+)
+
+# 写入线程的结束标记
+_STOP = object()
+
+
+class ConversationStore:
+    """只追加的对话记录存储
+
+    写入通过队列交给后台线程批量提交，不阻塞界面和请求线程；
+    读取按对话框分页，从最新的消息向前加载。
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._read_lock = threading.Lock()
+        self._read_conn = self._connect()
+        self._queue = Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="conversation-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+        return conn
+
+    def append(self, pane, message):
+        """追加一条已完成的消息"""
+        self.extend(pane, [message])
+
+    def extend(self, pane, messages):
+        """函数模块名称: 追加一组消息
+        输入参数:
+            pane - 对话框名称（"data"或"ai"）
+            messages - 消息字典列表，每条包含role和content
+        返回值: 无
+        功能描述: 将已完成的消息作为一项放入写入队列，由后台线程异步保存，
+                 同一组消息在存储中保持相邻（如一轮问题和回复）
+        """
+        now = time.time()
+        self._queue.put([(pane, message["role"], message["content"], now) for message in messages])
+
+    def _write_loop(self):
+        """后台写入线程：合并队列中已有的消息后一次提交"""
+        conn = self._connect()
+        while True:
+            item = self._queue.get()
+            batch = []
+            while item is not _STOP:
+                batch.extend(item)
+                if self._queue.empty():
+                    break
+                item = self._queue.get()
+            if batch:
+                conn.executemany(
+                    "INSERT INTO messages (pane, role, content, created_at) VALUES (?, ?, ?, ?)", batch
+                )
+                conn.commit()
+            if item is _STOP:
+                conn.close()
+                return
+
+    def _query(self, sql, params):
+        with self._read_lock:
+            rows = self._read_conn.execute(sql, params).fetchall()
+        # 查询按id倒序，返回时恢复为从旧到新
+        return [{"id": row[0], "role": row[1], "content": row[2]} for row in reversed(rows)]
+
+    def load_recent(self, pane, limit):
+        """读取对话框最新的limit条消息（从旧到新）"""
+        return self._query(
+            "SELECT id, role, content FROM messages WHERE pane = ? ORDER BY id DESC LIMIT ?",
+            (pane, limit),
+        )
+
+    def load_before(self, pane, before_id, limit):
+        """读取id小于before_id的limit条消息（从旧到新）"""
+        return self._query(
+            "SELECT id, role, content FROM messages WHERE pane = ? AND id < ? ORDER BY id DESC LIMIT ?",
+            (pane, before_id, limit),
+        )
+
+    def close(self):
+        """写完队列中剩余的消息并关闭存储"""
+        self._queue.put(_STOP)
+        self._writer.join()
+        self._read_conn.close()
@@ -1,6 +1,72 @@
-from PIL import Image, ImageEnhance
+import io
+import mimetypes
+from PIL import Image, ImageEnhance, ImageOps
+
+# 上传前预处理配置
+MAX_UPLOAD_EDGE = 1600   # 最长边像素上限
+UPLOAD_FORMAT = "JPEG"   # 重新编码格式：JPEG 或 WEBP
+UPLOAD_QUALITY = 85      # 重新编码质量
+UPLOAD_MIME_TYPES = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+DEFAULT_MIME_TYPE = "image/jpeg"  # 无法从扩展名判断类型时使用
+
+EXIF_ORIENTATION = 0x0112
+
 
 def process_image(image, value):
     """根据滑块值处理图片（示例：调整亮度）"""
     enhancer = ImageEnhance.Brightness(image)
     return enhancer.enhance(value / 100)
+
+
+def prepare_image_for_upload(image_bytes, filename=None, max_edge=MAX_UPLOAD_EDGE,
+                             image_format=UPLOAD_FORMAT, quality=UPLOAD_QUALITY):
+    """函数模块名称: 上传前图片预处理
+    输入参数:
+        image_bytes - 原始图片字节
+        filename - 原图文件名，无法处理时用于按扩展名判断MIME类型
+        max_edge - 最长边像素上限
+        image_format - 重新编码格式（JPEG/WEBP）
+        quality - 重新编码质量
+    返回值: (上传字节, MIME类型)
+    功能描述: 按EXIF方向摆正图片、缩小到最长边上限并重新编码；
+             若原图无需变换且重新编码不能减小体积，则直接上传原图；
+             PIL无法解码或转换的图片也直接上传原图，由接口自行识别
+    """
+    try:
+        return _reencode_image(image_bytes, max_edge, image_format, quality)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        mime_type = mimetypes.guess_type(filename or "")[0]
+        if mime_type is None or not mime_type.startswith("image/"):
+            mime_type = DEFAULT_MIME_TYPE
+        return image_bytes, mime_type
+
+
+def _reencode_image(image_bytes, max_edge, image_format, quality):
+    image = Image.open(io.BytesIO(image_bytes))
+    source_format = image.format
+    needs_rotate = image.getexif().get(EXIF_ORIENTATION, 1) != 1
+    needs_resize = max(image.size) > max_edge
+
+    image = ImageOps.exif_transpose(image)
+    if needs_resize:
+        image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+    # JPEG不支持透明通道，透明区域按白色背景合成
+    if image_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    elif image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA")
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, quality=quality, optimize=True)
+    data = buffer.getvalue()
+    mime_type = UPLOAD_MIME_TYPES[image_format]
+
+    if (len(data) >= len(image_bytes) and not needs_rotate and not needs_resize
+            and source_format in UPLOAD_MIME_TYPES):
+        data = image_bytes
+        mime_type = UPLOAD_MIME_TYPES[source_format]
+    return data, mime_type
@@ -0,0 +1,54 @@
+import threading
+import traceback
+
+
+class LatestJobWorker:
+    """只保留最新任务的后台工作线程
+
+    submit()会替换尚未开始执行的任务，过时的任务直接丢弃；正在执行的
+    任务通过传入的is_stale()得知已有更新的任务，可以在阶段之间提前放弃。
+    """
+
+    def __init__(self, name="latest-job-worker"):
+        self._cond = threading.Condition()
+        self._job = None
+        self._generation = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, func, *args):
+        """函数模块名称: 提交任务
+        输入参数:
+            func - 任务函数，调用方式为func(is_stale, *args)
+            args - 任务参数
+        返回值: 无
+        功能描述: 替换等待中的任务，并使正在执行的任务变为过时
+        """
+        with self._cond:
+            self._generation += 1
+            self._job = (self._generation, func, args)
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._job is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                generation, func, args = self._job
+                self._job = None
+            try:
+                func(lambda: generation != self._generation, *args)
+            except Exception:
+                # 单个任务出错不影响后续任务
+                traceback.print_exc()
+
+    def close(self):
+        """丢弃等待中的任务并结束线程（不等待正在执行的任务）"""
+        with self._cond:
+            self._closed = True
+            self._generation += 1
+            self._job = None
+            self._cond.notify()
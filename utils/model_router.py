@@ -0,0 +1,139 @@
+import ast
+import math
+import operator
+import re
+import statistics
+
+from utils.context_budget import estimate_tokens
+
+# 路由结果
+LOCAL = "local"  # 本地计算，不请求接口
+LIGHT = "light"  # 简单问答，使用轻量模型
+FULL = "full"    # 复杂请求，使用完整模型
+
+LIGHT_MAX_TOKENS = 40  # 轻量模型处理的问题长度上限
+# 出现这些词时说明需要计算或分析实验数据，交给完整模型
+COMPLEX_KEYWORDS = ("计算", "误差", "不确定度", "标准差", "平均", "拟合", "推导", "分析",
+                    "为什么", "证明", "检查", "处理", "数据", "公式")
+
+_NUMBER = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+# 算术表达式前后常见的提问用语
+_QUESTION_PREFIX = re.compile(r"^(请|帮我)?(计算|算一下|算|求)[:：]?")
+_QUESTION_SUFFIX = re.compile(r"(=|＝)?\s*(等于多少|等于几|是多少|结果是多少)?\s*[?？。]?$")
+_EXPRESSION_CHARS = re.compile(r"^[\d\s.+\-*/%(),a-z]+$")
+_REPLACEMENTS = (("×", "*"), ("÷", "/"), ("（", "("), ("）", ")"), ("，", ","), ("^", "**"))
+
+_OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.Div: operator.truediv, ast.Mod: operator.mod, ast.Pow: operator.pow,
+    ast.USub: operator.neg, ast.UAdd: operator.pos,
+}
+_FUNCTIONS = {
+    "sqrt": math.sqrt, "sin": math.sin, "cos": math.cos, "tan": math.tan,
+    "log": math.log, "ln": math.log, "lg": math.log10, "exp": math.exp, "abs": abs,
+}
+_CONSTANTS = {"pi": math.pi, "e": math.e}
+MAX_EXPONENT = 100  # 防止 9^9^9 之类的表达式长时间计算
+
+# 数据统计：(关键词, 名称, 计算函数)，标准差与计算器一致使用样本标准差
+_STATISTICS = (
+    ("标准差", "标准差", statistics.stdev),
+    ("平均", "平均数", statistics.mean),
+    ("均值", "平均数", statistics.mean),
+)
+_STATISTICS_FILLER = re.compile(r"[\s,，、;；:：?？。]|计算|求|一下|这组|数据|的|和|与|值|数")
+
+
+def _evaluate_node(node):
+    if isinstance(node, ast.Expression):
+        return _evaluate_node(node.body)
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return node.value
+    if isinstance(node, ast.Name) and node.id in _CONSTANTS:
+        return _CONSTANTS[node.id]
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _OPERATORS:
+        return _OPERATORS[type(node.op)](_evaluate_node(node.operand))
+    if isinstance(node, ast.BinOp) and type(node.op) in _OPERATORS:
+        left, right = _evaluate_node(node.left), _evaluate_node(node.right)
+        if isinstance(node.op, ast.Pow) and abs(right) > MAX_EXPONENT:
+            raise ValueError("指数过大")
+        return _OPERATORS[type(node.op)](left, right)
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and node.func.id in _FUNCTIONS and not node.keywords):
+        return _FUNCTIONS[node.func.id](*(_evaluate_node(arg) for arg in node.args))
+    raise ValueError("不支持的表达式")
+
+
+def evaluate_expression(text):
+    """函数模块名称: 本地计算算术表达式
+    输入参数: text - 用户输入，如"计算 (1.2+3)^2 等于多少"
+    返回值: 计算结果（浮点数）；不是纯算术表达式或结果超出浮点范围时返回None
+    功能描述: 去掉提问用语后用语法树安全求值（不使用eval），
+             支持四则运算、^乘方和常用数学函数
+    """
+    expression = _QUESTION_SUFFIX.sub("", _QUESTION_PREFIX.sub("", text.strip())).strip().lower()
+    for old, new in _REPLACEMENTS:
+        expression = expression.replace(old, new)
+    if not expression or not _EXPRESSION_CHARS.match(expression):
+        return None
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError:
+        return None
+    # 单个数字不算计算请求
+    if isinstance(tree.body, ast.Constant):
+        return None
+    try:
+        # 整数运算不会溢出但可能得到极大的数，转换为浮点数后才能格式化输出
+        value = float(_evaluate_node(tree))
+    except (ValueError, TypeError, ZeroDivisionError, OverflowError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+def evaluate_statistics(text):
+    """函数模块名称: 本地计算数据统计量
+    输入参数: text - 用户输入，如"计算 1.2 1.3 1.25 的标准差"
+    返回值: [(名称, 结果), ...]；不是简单统计请求时返回None
+    功能描述: 只有一组数字加上标准差/平均数等关键词、没有其他内容时才本地计算
+    """
+    numbers = [float(n) for n in _NUMBER.findall(text)]
+    if len(numbers) < 2:
+        return None
+    rest = _NUMBER.sub("", text)
+    results = []
+    for keyword, name, function in _STATISTICS:
+        if keyword in rest:
+            rest = rest.replace(keyword, "")
+            if name not in dict(results):
+                results.append((name, function(numbers)))
+    if not results or _STATISTICS_FILLER.sub("", rest):
+        return None
+    return results
+
+
+def _format_number(value):
+    return f"{value:.6g}"
+
+
+def route(query, follow_up=False):
+    """函数模块名称: 选择回答方式
+    输入参数:
+        query - 用户问题
+        follow_up - 是否为本次会话中的追问（之前已有问答）
+    返回值: (路由, 本地计算的回答文本或None)
+    功能描述: 纯算术和简单统计本地计算；不是追问的简短问答交给轻量模型；
+             其余请求（含追问和数据分析）交给完整模型
+    """
+    value = evaluate_expression(query)
+    if value is not None:
+        return LOCAL, f"计算结果：**{_format_number(value)}**"
+    results = evaluate_statistics(query)
+    if results is not None:
+        return LOCAL, "\n\n".join(f"{name}：**{_format_number(v)}**" for name, v in results)
+
+    if (not follow_up and estimate_tokens(query) <= LIGHT_MAX_TOKENS
+            and len(_NUMBER.findall(query)) < 3
+            and not any(keyword in query for keyword in COMPLEX_KEYWORDS)):
+        return LIGHT, None
+    return FULL, None
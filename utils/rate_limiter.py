@@ -0,0 +1,123 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+from utils.context_budget import MESSAGE_OVERHEAD, estimate_tokens
+
+# 请求优先级：数值越小越先调度
+INTERACTIVE = 0  # 对话框中的交互请求
+BATCH = 1        # 批量识别等后台任务
+
+IMAGE_TOKEN_ESTIMATE = 1000  # 每张图片按固定token数估算
+OUTPUT_TOKEN_RESERVE = 500   # 为回复预留的token数
+
+
+def estimate_request_tokens(messages):
+    """函数模块名称: 估算请求token数
+    输入参数: messages - 请求的消息列表
+    返回值: 估算的token数（含回复预留）
+    功能描述: 文本按字符估算，图片按固定值计，不解析base64内容
+    """
+    total = OUTPUT_TOKEN_RESERVE
+    for message in messages:
+        total += MESSAGE_OVERHEAD
+        content = message["content"]
+        if isinstance(content, str):
+            total += estimate_tokens(content)
+            continue
+        for part in content:
+            if part.get("type") == "text":
+                total += estimate_tokens(part["text"])
+            else:
+                total += IMAGE_TOKEN_ESTIMATE
+    return total
+
+
+class _Bucket:
+    """令牌桶：容量为每分钟上限，按匀速补充"""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._updated = time.monotonic()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount):
+        """令牌足够时返回0，否则返回还需等待的秒数"""
+        return max(0.0, (amount - self.level) / self.rate)
+
+
+class RateLimiter:
+    """客户端请求调度器
+
+    同时限制每分钟请求数和每分钟token数。等待中的请求按(优先级, 到达顺序)
+    排队，只有队首请求能取得令牌，因此交互请求总是先于批量任务，
+    同一优先级内先到先得，不会出现大请求被小请求反复插队而饿死。
+    只能在后台事件循环中使用，无需加锁。
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self._requests = _Bucket(requests_per_minute)
+        self._tokens = _Bucket(tokens_per_minute)
+        self._queue = []
+        self._counter = itertools.count()
+        self._timer = None
+
+    async def acquire(self, tokens, priority=INTERACTIVE):
+        """函数模块名称: 申请发送请求
+        输入参数:
+            tokens - 本次请求估算的token数
+            priority - 优先级（INTERACTIVE或BATCH）
+        返回值: 无（轮到本请求且令牌足够时返回）
+        功能描述: 加入等待队列，按优先级和到达顺序取得令牌；等待中被取消时
+                 立即让后面的请求继续调度
+        """
+        # 超过桶容量的请求按满桶计，否则永远等不到
+        tokens = min(tokens, self._tokens.capacity)
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._counter), tokens, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 已分配令牌但还没开始发送就被取消，归还令牌
+                self._requests.level = min(self._requests.capacity, self._requests.level + 1)
+                self._tokens.level = min(self._tokens.capacity, self._tokens.level + tokens)
+            else:
+                future.cancel()
+            self._dispatch()
+            raise
+
+    def _dispatch(self):
+        """按队列顺序放行令牌足够的请求，不够时定时到补足为止"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        self._requests.refill(now)
+        self._tokens.refill(now)
+        while self._queue:
+            _, _, tokens, future = self._queue[0]
+            if future.done():
+                # 等待中被取消的请求
+                heapq.heappop(self._queue)
+                continue
+            wait = max(self._requests.wait_time(1), self._tokens.wait_time(tokens))
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self._queue)
+            self._requests.level -= 1
+            self._tokens.level -= tokens
+            future.set_result(None)
+
+    @property
+    def pending(self):
+        """排队等待中的请求数"""
+        return sum(1 for *_, future in self._queue if not future.done())
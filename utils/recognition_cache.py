@@ -0,0 +1,100 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+
+# 缓存目录位于项目根目录下的cache/recognition
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "recognition")
+MAX_CACHE_BYTES = 50 * 1024 * 1024  # 缓存总大小上限
+
+
+class RecognitionCache:
+    """图片识别结果的内容寻址磁盘缓存
+
+    以图片字节、模型名称和提示词的哈希作为键，每条结果保存为一个JSON文件，
+    记录原始的数据块序列。文件修改时间作为最近访问时间，总大小超过上限时
+    按最近最少使用的顺序淘汰。
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(image_bytes, model, prompt, options=""):
+        """根据图片内容、模型、提示词和预处理配置生成缓存键"""
+        digest = hashlib.sha256()
+        digest.update(image_bytes)
+        digest.update(b"\0" + model.encode("utf-8"))
+        digest.update(b"\0" + prompt.encode("utf-8"))
+        digest.update(b"\0" + options.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """函数模块名称: 读取缓存
+        输入参数: key - 缓存键
+        返回值: 数据块列表，未命中时返回None
+        功能描述: 读取缓存结果并刷新其访问时间
+        """
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    chunks = json.load(f)["chunks"]
+                os.utime(path, None)
+            except (OSError, ValueError, KeyError):
+                return None
+        return chunks
+
+    def put(self, key, chunks):
+        """函数模块名称: 写入缓存
+        输入参数:
+            key - 缓存键
+            chunks - 数据块列表
+        返回值: 无
+        功能描述: 原子地写入一条缓存结果，并在超出大小上限时淘汰旧条目
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with self._lock:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"chunks": chunks}, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+                self._evict()
+            except OSError:
+                # 缓存写入失败不影响正常识别
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def _evict(self):
+        """按访问时间从旧到新删除条目，直到总大小不超过上限"""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+
+async def replay_chunks(chunks):
+    """将缓存的数据块作为模拟流逐块产出"""
+    for chunk in chunks:
+        yield chunk
+        await asyncio.sleep(0)  # 让出事件循环，保持与真实流一致的调度方式
@@ -0,0 +1,121 @@
+import math
+import random
+import threading
+import time
+
+# 可重试的HTTP状态码
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+class RetryPolicy:
+    """带抖动的指数退避重试策略
+
+    第n次重试前等待 [0, min(max_delay, base_delay * 2^n)] 内的随机时间
+    （全抖动），服务端返回Retry-After时至少等待该时长。
+    """
+
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=8.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt, exc=None):
+        """函数模块名称: 计算退避时间
+        输入参数:
+            attempt - 已失败的次数（从0开始）
+            exc - 本次失败的异常，用于读取Retry-After
+        返回值: 等待秒数
+        功能描述: 全抖动指数退避，并遵守服务端的Retry-After
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        retry_after = _retry_after(exc)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+
+def _retry_after(exc):
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class IncompleteStreamError(Exception):
+    """流在收到结束标记（finish_reason）之前中断"""
+
+
+def is_retryable(exc):
+    """判断异常是否为暂时性故障（限流、服务端错误、连接错误、超时、流中断）"""
+    if isinstance(exc, IncompleteStreamError):
+        return True
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+
+    import httpx
+    import openai
+    return isinstance(exc, (openai.APIConnectionError, httpx.TransportError))
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开时快速失败"""
+
+
+class CircuitBreaker:
+    """熔断器
+
+    连续failure_threshold次暂时性故障后打开，reset_timeout秒内的请求直接
+    失败；超时后进入半开状态，只放行一个试探请求，成功则关闭，失败则
+    重新打开。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """请求前检查，熔断时抛出CircuitOpenError"""
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self._opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    raise CircuitOpenError(f"接口连续失败，已暂停请求，约{math.ceil(remaining)}秒后重试")
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    raise CircuitOpenError("接口正在恢复检测中，请稍后重试")
+                self._probe_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        """请求既未成功也未失败（例如被取消）时释放半开状态的试探名额"""
+        with self._lock:
+            self._probe_in_flight = False
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+# 缓存数据库位于项目根目录下的cache目录
+CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "responses.sqlite3")
+DEFAULT_TTL = 7 * 24 * 3600  # 缓存有效期（秒）
+MAX_ENTRIES = 1000           # 缓存条目上限
+
+
+def normalize_query(query):
+    """统一全半角、大小写和空白，使等价的问题得到相同的键"""
+    text = unicodedata.normalize("NFKC", query).strip().lower()
+    return re.sub(r"\s+", " ", text)
+
+
+class ResponseCache:
+    """智能助手回复的SQLite缓存
+
+    键由规范化后的问题、系统提示词和模型名称共同决定。条目超过有效期后
+    视为未命中；条目数超过上限时按最近访问时间淘汰。
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=DEFAULT_TTL, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, chunks TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses(accessed_at)")
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def make_key(query, system_prompt, model, context=""):
+        """根据问题、系统提示词、模型和对话上下文生成缓存键"""
+        raw = "\0".join([model, system_prompt, context, normalize_query(query)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """函数模块名称: 读取缓存
+        输入参数: key - 缓存键
+        返回值: 数据块列表，未命中或已过期时返回None
+        功能描述: 查询缓存并更新命中/未命中计数
+        """
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT chunks, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None or now - row[1] > self.ttl:
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                conn.commit()
+            except sqlite3.Error:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, key, chunks):
+        """函数模块名称: 写入缓存
+        输入参数:
+            key - 缓存键
+            chunks - 数据块列表
+        返回值: 无
+        功能描述: 写入一条回复，清理过期条目并按访问时间淘汰超出上限的条目
+        """
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, chunks, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(chunks, ensure_ascii=False), now, now),
+                )
+                conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                conn.commit()
+            except sqlite3.Error:
+                # 缓存写入失败不影响正常回复
+                pass
+
+    def stats(self):
+        """返回命中、未命中次数和命中率"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,74 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+# 录制文件保存在项目根目录下的recordings目录
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "recordings")
+
+LIVE = "live"      # 正常请求接口
+RECORD = "record"  # 请求接口并录制回复
+REPLAY = "replay"  # 只回放录制的回复，不访问网络
+MODES = (LIVE, RECORD, REPLAY)
+
+
+def make_key(model, messages):
+    """由模型和完整消息列表生成录制文件名"""
+    payload = json.dumps({"model": model, "messages": messages}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _path(key, directory):
+    return os.path.join(directory, f"{key}.json")
+
+
+class StreamRecorder:
+    """录制一次流式回复的数据块及其间隔时间
+
+    只有完整结束的流才调用save()写入文件，失败或取消的流不保存。
+    """
+
+    def __init__(self, model, messages, directory=RECORDINGS_DIR):
+        self.model = model
+        self.key = make_key(model, messages)
+        self.directory = directory
+        self.chunks = []  # [距上一块的秒数, 文本]
+        self._last = time.perf_counter()
+
+    def add(self, content):
+        now = time.perf_counter()
+        self.chunks.append([now - self._last, content])
+        self._last = now
+
+    def save(self):
+        """写入录制文件（先写临时文件再替换，避免中断时留下半个文件）"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = _path(self.key, self.directory)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"model": self.model, "recorded_at": time.time(), "chunks": self.chunks},
+                      f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return path
+
+
+async def replay(model, messages, speed=1.0, directory=RECORDINGS_DIR):
+    """函数模块名称: 回放录制的回复
+    输入参数:
+        model - 模型名称
+        messages - 消息列表（与录制时相同）
+        speed - 回放倍速，1为录制时的速度，0为不等待、尽快输出
+        directory - 录制文件目录
+    返回值: 异步生成器，按录制顺序产出数据块
+    功能描述: 读取与请求对应的录制文件，按记录的间隔时间回放
+    """
+    path = _path(make_key(model, messages), directory)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"没有与该请求对应的录制文件：{path}")
+    with open(path, encoding="utf-8") as f:
+        chunks = json.load(f)["chunks"]
+    for delay, content in chunks:
+        if speed > 0:
+            await asyncio.sleep(delay / speed)
+        yield content
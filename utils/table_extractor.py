@@ -0,0 +1,132 @@
+import re
+
+import numpy as np
+
+# 单元格开头的数值（允许后面跟单位，如"12.5mm"）
+_NUMBER = re.compile(r"^[-+−]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+# Markdown表格的分隔行，如 |---|:---:|
+_SEPARATOR = re.compile(r"^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$")
+# 非Markdown行按空白、逗号、分号分隔
+_DELIMITERS = re.compile(r"[\s,，;；]+")
+
+MIN_TABLE_ROWS = 2
+MIN_TABLE_COLUMNS = 2
+
+
+def _split_cells(line):
+    line = line.strip()
+    if "|" in line:
+        return [cell.strip() for cell in line.strip("|").split("|")]
+    return [cell for cell in _DELIMITERS.split(line) if cell]
+
+
+def _parse_number(cell):
+    match = _NUMBER.match(cell.replace("−", "-"))
+    return float(match.group()) if match else None
+
+
+def parse_row(line):
+    """函数模块名称: 解析数据行
+    输入参数: line - 一行文本
+    返回值: (表头单元格列表或None, 数值列表或None)
+    功能描述: 全部单元格（允许首列为行标签）都是数值时返回数值列表；
+             Markdown表格中的非数值行作为表头返回
+    """
+    cells = _split_cells(line)
+    if not cells:
+        return None, None
+    values = [_parse_number(cell) for cell in cells]
+    numeric = [v for v in values if v is not None]
+
+    # 首列可以是"第1次"之类的行标签
+    if values[0] is None:
+        values = values[1:]
+    if len(numeric) >= MIN_TABLE_COLUMNS and all(v is not None for v in values):
+        return None, numeric
+    if "|" in line:
+        return cells, None
+    return None, None
+
+
+class IncrementalTableParser:
+    """从流式文本中增量提取数值表格
+
+    每次feed()只处理新到达的完整行，未结束的最后一行留在缓冲区，
+    不会重复扫描已经处理过的文本。列数一致的连续数值行组成一张表，
+    完成的表格转换为NumPy数组。
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._header = None
+        self._rows = []
+        self.tables = []  # 已完成的表格：{"header": 列名列表或None, "data": 二维数组}
+
+    def feed(self, chunk):
+        """函数模块名称: 输入数据块
+        输入参数: chunk - 新到达的文本
+        返回值: 本次新完成的表格列表
+        功能描述: 解析新增的完整行，返回因此结束的表格
+        """
+        self._buffer += chunk
+        if "\n" not in chunk:
+            return []
+        *lines, self._buffer = self._buffer.split("\n")
+        completed = []
+        for line in lines:
+            table = self._consume(line)
+            if table is not None:
+                completed.append(table)
+        return completed
+
+    def finish(self):
+        """流结束时处理剩余文本，返回全部表格"""
+        if self._buffer:
+            self._consume(self._buffer)
+            self._buffer = ""
+        self._close_table()
+        return self.tables
+
+    def _consume(self, line):
+        """处理一整行，若导致当前表格结束则返回该表格"""
+        if _SEPARATOR.match(line):
+            return None
+        header, values = parse_row(line)
+        if values is not None:
+            if self._rows and len(values) != len(self._rows[0]):
+                table = self._close_table()
+                self._rows = [values]
+                return table
+            self._rows.append(values)
+            return None
+
+        table = self._close_table()
+        self._header = header
+        return table
+
+    def _close_table(self):
+        """结束当前表格，满足最小行列数时转换为数组并保存"""
+        rows, header = self._rows, self._header
+        self._rows, self._header = [], None
+        if len(rows) < MIN_TABLE_ROWS:
+            return None
+        data = np.array(rows, dtype=float)
+        if header is not None and len(header) != data.shape[1]:
+            # 表头含行标签列时去掉第一列
+            header = header[-data.shape[1]:] if len(header) > data.shape[1] else None
+        table = {"header": header, "data": data}
+        self.tables.append(table)
+        return table
+
+
+def value_columns(table):
+    """函数模块名称: 取出数据列
+    输入参数: table - 提取出的表格
+    返回值: 二维数组
+    功能描述: 首列为1、2、3…的序号列且还有至少两列数据时去掉序号列，
+             其余情况返回完整数据（序号列在表格中原样保留）
+    """
+    data = table["data"]
+    if data.shape[1] >= 3 and np.array_equal(data[:, 0], np.arange(1, data.shape[0] + 1)):
+        return data[:, 1:]
+    return data
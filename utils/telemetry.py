@@ -0,0 +1,182 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from logging.handlers import RotatingFileHandler
+
+# 指标文件位于项目根目录下的metrics目录，按大小滚动
+METRICS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "metrics")
+METRICS_FILE = os.path.join(METRICS_DIR, "api_metrics.jsonl")
+MAX_METRICS_BYTES = 1024 * 1024
+METRICS_BACKUP_COUNT = 3
+
+_metrics_logger = None
+
+
+def _get_metrics_logger():
+    """获取写入指标文件的专用日志器（首次调用时创建）"""
+    global _metrics_logger
+    if _metrics_logger is None:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        handler = RotatingFileHandler(
+            METRICS_FILE, maxBytes=MAX_METRICS_BYTES,
+            backupCount=METRICS_BACKUP_COUNT, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger = logging.getLogger("api_metrics")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(handler)
+        _metrics_logger = logger
+    return _metrics_logger
+
+
+class StreamMetrics:
+    """单次流式请求的性能记录
+
+    connect_s为从发起请求到收到响应头（流对象返回）的时间，ttft_s为首个
+    文本块到达的时间。每个数据块按一个token计。作为上下文管理器使用时，
+    退出时写入一条JSON记录，异常会记录其类名；被取消（停止按钮、被新请求
+    替换）不算错误，记为cancelled。extra中的字段（如图片预处理前后的字节数）
+    原样写入记录。
+    """
+
+    def __init__(self, model, request_bytes=0, extra=None):
+        self.model = model
+        self.request_bytes = request_bytes
+        self.extra = extra or {}
+        self.response_bytes = 0
+        self.chunks = 0
+        self.error = None
+        self.cancelled = False
+        self._start = None
+        self._connected = None
+        self._first_token = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and issubclass(exc_type, (asyncio.CancelledError, GeneratorExit)):
+            self.cancelled = True
+        elif exc_type is not None and self.error is None:
+            self.error = exc_type.__name__
+        self.finish()
+        return False
+
+    def mark_connected(self):
+        self._connected = time.perf_counter()
+
+    def add_chunk(self, content):
+        if self._first_token is None:
+            self._first_token = time.perf_counter()
+        self.chunks += 1
+        self.response_bytes += len(content.encode("utf-8"))
+
+    def finish(self):
+        """计算指标并写入指标文件"""
+        end = time.perf_counter()
+        record = {
+            "ts": time.time(),
+            "model": self.model,
+            "connect_s": _elapsed(self._start, self._connected),
+            "ttft_s": _elapsed(self._start, self._first_token),
+            "total_s": end - self._start,
+            "tokens": self.chunks,
+            "tokens_per_s": None,
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "error": self.error,
+            "cancelled": self.cancelled,
+            **self.extra,
+        }
+        if self._first_token is not None and end > self._first_token:
+            record["tokens_per_s"] = self.chunks / (end - self._first_token)
+        try:
+            _get_metrics_logger().info(json.dumps(record, ensure_ascii=False))
+        except OSError:
+            # 指标写入失败不影响正常请求
+            pass
+
+
+def log_route(route, model, total_s, ttft_s=None, fallback=False):
+    """记录一次智能助手请求的路由选择和端到端耗时"""
+    record = {
+        "ts": time.time(),
+        "event": "route",
+        "route": route,
+        "model": model,
+        "ttft_s": ttft_s,
+        "total_s": total_s,
+        "fallback": fallback,
+    }
+    try:
+        _get_metrics_logger().info(json.dumps(record, ensure_ascii=False))
+    except OSError:
+        pass
+
+
+def _elapsed(start, end):
+    return None if end is None else end - start
+
+
+def load_records():
+    """读取当前及滚动备份的指标文件中的全部记录"""
+    paths = [f"{METRICS_FILE}.{i}" for i in range(METRICS_BACKUP_COUNT, 0, -1)] + [METRICS_FILE]
+    records = []
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    return records
+
+
+def percentile(values, p):
+    """最近秩法计算百分位数，values为空时返回None"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(records):
+    """函数模块名称: 汇总指标
+    输入参数: records - 指标记录列表
+    返回值: {模型名称: 汇总字典}
+    功能描述: 按模型统计请求数、错误数、取消数以及各项延迟和速度的p50/p95；
+             被取消的请求不算错误，其连接和首字延迟计入统计，
+             总耗时和速度因输出不完整不计入
+    """
+    by_model = {}
+    for record in records:
+        if record.get("event") == "route":
+            # 路由记录单独统计，不计入模型请求
+            continue
+        by_model.setdefault(record["model"], []).append(record)
+
+    summary = {}
+    for model, items in by_model.items():
+        stats = {
+            "count": len(items),
+            "errors": sum(1 for r in items if r.get("error")),
+            "cancelled": sum(1 for r in items if r.get("cancelled")),
+        }
+        for field in ("connect_s", "ttft_s", "total_s", "tokens_per_s"):
+            values = [
+                r[field] for r in items
+                if r.get(field) is not None and not r.get("error")
+                and not (r.get("cancelled") and field in ("total_s", "tokens_per_s"))
+            ]
+            stats[f"{field}_p50"] = percentile(values, 50)
+            stats[f"{field}_p95"] = percentile(values, 95)
+        summary[model] = stats
+    return summary
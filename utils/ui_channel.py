@@ -0,0 +1,63 @@
+import threading
+import time
+
+
+class CoalescingChannel:
+    """后台线程到Tk主线程的合并更新通道
+
+    后台线程调用notify()登记某个键有新内容；同一键在两次刷新之间的多次
+    通知会被合并成一次。只有从空闲变为有待处理内容时才唤醒Tk事件循环，
+    刷新频率受max_fps限制，强制更新（例如流结束）会立即刷新。
+    """
+
+    WAKE_EVENT = "<<ChannelWakeup>>"
+
+    def __init__(self, widget, handler, max_fps=20):
+        self.widget = widget
+        self.handler = handler          # handler(key, force)，在Tk主线程中调用
+        self.min_interval = 1.0 / max_fps
+        self._lock = threading.Lock()
+        self._pending = {}              # 键 -> 是否强制更新
+        self._wake_pending = False      # 是否已有唤醒事件在途
+        self._flush_scheduled = False   # 是否已安排延迟刷新（仅主线程访问）
+        self._last_flush = 0.0
+        widget.bind(self.WAKE_EVENT, self._on_wake, add="+")
+
+    def notify(self, key, force=False):
+        """函数模块名称: 登记更新
+        输入参数:
+            key - 更新的目标（如对话框名称）
+            force - 是否忽略帧率限制立即刷新
+        返回值: 无
+        功能描述: 可在任意线程调用，必要时唤醒Tk事件循环
+        """
+        with self._lock:
+            self._pending[key] = self._pending.get(key, False) or force
+            if self._wake_pending and not force:
+                return
+            self._wake_pending = True
+        self.widget.event_generate(self.WAKE_EVENT, when="tail")
+
+    def _on_wake(self, event=None):
+        """唤醒事件处理：按帧率上限立即或延迟刷新"""
+        with self._lock:
+            force = any(self._pending.values())
+        delay = self.min_interval - (time.monotonic() - self._last_flush)
+        if force or delay <= 0:
+            self._flush()
+        elif not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.widget.after(int(delay * 1000) + 1, self._flush)
+
+    def _flush(self):
+        """取出全部待处理更新并交给handler"""
+        self._flush_scheduled = False
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            self._wake_pending = False
+        if not pending:
+            return
+        self._last_flush = time.monotonic()
+        for key, force in pending.items():
+            self.handler(key, force)